@@ -1,8 +1,19 @@
 import streamlit as st
-import pandas as pd
 import warnings
 from datetime import datetime
 import io
+from preview import summarize_output, show_preview
+from bulk_io import read_sheets, engine_selector, MULTI_SHEET_UPLOAD_TYPES
+from uploads import spool_upload
+from hierarchy import BulkHierarchy
+from targeting import classify_targeting
+from lazy_imports import lazy_import
+from warmup import start_warm_up
+
+pd = lazy_import('pandas')
+
+# Preload heavy modules in the background while the first page is shown
+start_warm_up()
 
 # Suppress the specific UserWarning from openpyxl
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
@@ -11,7 +22,7 @@ st.title("SP Performing Search Terms")
 st.markdown("""
 This app extracts Sponsored Products performing customer search terms.<br>
 Upon processing app creates output file ready for uploading via Ad Console.<br><br>
-Input file - Bulk Report XLSX <br>
+Input file - Bulk Report XLSX, or ZIP with one CSV/TSV per sheet <br>
 Required sheets - Portfolios, SP Campaigns, SP Search terms.<br>
 Extraction criteria - Units>=2, below Target ACOS.<br><br>
 Output file - &nbsp;Bulk XLSX<br>
@@ -37,17 +48,18 @@ May require review before uploading to check for branded terms, etc.
 acos_input = st.number_input("Enter target ACOS (%)", min_value=0.0, max_value=100.0, value=0.0)
 acos_value = acos_input / 100  # Convert to decimal for calculations
 
+# Excel reader engine
+reader_engine = engine_selector()
+
 # File uploader
-uploaded_file = st.file_uploader("Upload your Excel file", type=["xlsx"])
+uploaded_file = st.file_uploader("Upload your Excel file", type=MULTI_SHEET_UPLOAD_TYPES)
 
-if uploaded_file is not None:
-    # Load the Excel file
-    file_path = uploaded_file
+# Spool the upload to disk and read it through a memory map
+file_path = spool_upload(uploaded_file)
 
+if uploaded_file is not None:
     # READ BULK SHEET
-    portfolios_df = pd.read_excel(file_path, sheet_name='Portfolios')
-    sp_df = pd.read_excel(file_path, sheet_name='Sponsored Products Campaigns')
-    sts_sp_df = pd.read_excel(file_path, sheet_name='SP Search Term Report')
+    portfolios_df, sp_df, sts_sp_df = read_sheets(file_path, ['Portfolios', 'Sponsored Products Campaigns', 'SP Search Term Report'], reader_engine)
 
     # CLEAN AND MODIFY
     sp_df['Portfolio Name (Informational only)'] = sp_df['Portfolio Name (Informational only)'].fillna('No portfolio')
@@ -73,6 +85,9 @@ if uploaded_file is not None:
     # Exclude rows where Entity is 'Product Targeting'
     sp_df = sp_df[sp_df['Entity'] != 'Product Targeting']
 
+    # Campaign hierarchy index shared by the lookups below
+    sp_hierarchy = BulkHierarchy(sp_df)
+
     # CALCULATING BIDS AND BUDGETS
     avg_cpc_df = sts_sp_df.groupby(['Customer Search Term', 'Portfolio ID'])['CPC'].mean().reset_index()
     avg_cpc_df = avg_cpc_df.rename(columns={'Customer Search Term': 'Keyword', 'CPC': 'Avg CPC'})
@@ -82,16 +97,14 @@ if uploaded_file is not None:
     avg_budget_df = avg_budget_df.rename(columns={'Daily Budget': 'Avg Daily Budget'})
 
     # EXTRACTING BEST PERFORMING SKUS BY PORTFOLIO
-    portfolio_columns = sp_df[['Portfolio ID', 'Portfolio Name (Informational only)', 'SKU', 'Sales']]
-    portfolio_columns = portfolio_columns.dropna(subset=['SKU', 'Sales'])
-    best_sku_per_portfolio = portfolio_columns.loc[portfolio_columns.groupby(['Portfolio ID', 'Portfolio Name (Informational only)'])['Sales'].idxmax()]
+    best_sku_per_portfolio = sp_hierarchy.best_sku_per_portfolio()
     best_sku_per_portfolio = best_sku_per_portfolio.rename(columns={'Portfolio Name (Informational only)': 'Portfolio Name', 'SKU': 'SKU'})
     best_sku_per_portfolio = best_sku_per_portfolio.reset_index(drop=True)
     
     # EXISTING KWS DF CREATED AND CLEANED
-    existing_keywords_df = sp_df[sp_df['Entity'] == 'Keyword'][['Keyword Text', 'Campaign Name (Informational only)', 'Ad Group Name (Informational only)']].rename(columns={'Keyword Text': 'Keyword', 'Campaign Name (Informational only)': 'Campaign', 'Ad Group Name (Informational only)': 'Ad Group'})
+    existing_keywords_df = sp_hierarchy.entity_frame('Keyword')[['Keyword Text', 'Campaign Name (Informational only)', 'Ad Group Name (Informational only)']].rename(columns={'Keyword Text': 'Keyword', 'Campaign Name (Informational only)': 'Campaign', 'Ad Group Name (Informational only)': 'Ad Group'})
     existing_keywords_df = existing_keywords_df.drop_duplicates(subset=['Keyword', 'Campaign', 'Ad Group'], keep='first')
-    existing_keywords_df = existing_keywords_df[~existing_keywords_df['Keyword'].str.contains(r'\+')]
+    existing_keywords_df = existing_keywords_df[classify_targeting(existing_keywords_df['Keyword']) != 'broad-modifier']
     existing_keywords_df.reset_index(drop=True, inplace=True)
 
     # PERFORMING SEARCH TERMS EXTRACTION AND CHECKING AGAINST EXISTING KEYWORDS
@@ -99,8 +112,8 @@ if uploaded_file is not None:
     performing_sts_df = performing_sts_df.rename(columns={'Customer Search Term': 'Keyword', 'Campaign Name (Informational only)': 'Campaign', 'Ad Group Name (Informational only)': 'Ad Group'})
     performing_sts_df = performing_sts_df.drop_duplicates(subset=['Keyword', 'Campaign', 'Ad Group'])
 
-    # Filter out search terms containing 'b0'
-    performing_sts_df = performing_sts_df[~performing_sts_df['Keyword'].str.contains(r'b0', case=False, na=False)]
+    # Filter out search terms that are ASINs
+    performing_sts_df = performing_sts_df[classify_targeting(performing_sts_df['Keyword']) != 'asin']
 
     # Identify duplicates with existing keywords
     duplicate_keywords_df = performing_sts_df.merge(existing_keywords_df, how='inner', on=['Keyword'])
@@ -293,7 +306,7 @@ if uploaded_file is not None:
 
     # Display the final_output_df to verify
     st.write("Final Output DataFrame with 'Entity' column filled:")
-    st.dataframe(final_output_df)
+    show_preview(final_output_df, key='final_output', summary=summarize_output(final_output_df))
 
     # Provide download link for the final output
     buffer = io.BytesIO()
@@ -1,16 +1,26 @@
 import streamlit as st
-import pandas as pd
 import warnings
 from io import BytesIO
+from bulk_io import read_sheet, engine_selector, UPLOAD_TYPES
+from uploads import spool_upload
+from bulk_delta import minimal_delta, delta_report
+from sweep import percent_of_budget, budget_sweep, parse_grid, format_grid, format_value, default_index, REPORT_DAYS, POB_CUTOFFS, BUDGET_MULTIPLIERS
+from lazy_imports import lazy_import
+from warmup import start_warm_up
+
+pd = lazy_import('pandas')
+
+# Preload heavy modules in the background while the first page is shown
+start_warm_up()
 
 # Suppress the specific UserWarning from openpyxl
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
-# Function to process the data
-def process_data(file):
+# Function to load the enabled Campaign rows of the bulk file
+def load_campaigns(file, reader_engine='auto'):
     try:
         # Load the Excel file
-        sp_df = pd.read_excel(file, sheet_name='Sponsored Products Campaigns')
+        sp_df = read_sheet(file, 'Sponsored Products Campaigns', reader_engine)
 
         # Filter sp_df for 'enabled'
         sp_df = sp_df[(sp_df['State'] == 'enabled') & (sp_df['Campaign State (Informational only)'] == 'enabled')]
@@ -33,37 +43,78 @@ def process_data(file):
 
         # Filter Entity for Campaign only
         campaign_sp_df = sp_df[sp_df['Entity'] == 'Campaign']
-        campaign_sp_df = campaign_sp_df.reset_index(drop=True)
+        return campaign_sp_df.reset_index(drop=True)
+    except Exception as e:
+        st.error(f"Error processing data: {e}")
+        return pd.DataFrame()  # Return an empty DataFrame on error
 
-        # Create 'POB' column with values Spend/14/Daily Budget
-        campaign_sp_df['POB'] = campaign_sp_df.apply(lambda row: row['Spend'] / 14 / row['Daily Budget'] if row['Daily Budget'] != 0 else 0, axis=1)
+# Function to select the campaigns spending at least pob_cutoff of their budget and raise their budgets
+def update_budgets(campaign_sp_df, report_days=14, pob_cutoff=0.8, multiplier=1.2):
+    # POB = Spend / report days / Daily Budget
+    pob = percent_of_budget(campaign_sp_df['Spend'], campaign_sp_df['Daily Budget'], report_days)
 
-        # Create 'Bud Ref' column with values mirroring Daily Budget
-        campaign_sp_df['Bud Ref'] = campaign_sp_df['Daily Budget']
+    # Filter campaigns at or above the POB cutoff
+    selected_sp_df = campaign_sp_df[pob >= pob_cutoff]
+    selected_sp_df = selected_sp_df.reset_index(drop=True)
 
-        # Filter 80% camps for Campaign only
-        selected_sp_df = campaign_sp_df[campaign_sp_df['POB'] >= 0.8]
-        selected_sp_df = selected_sp_df.reset_index(drop=True)
+    # Keep the rows as they were before the update for the minimal-delta output
+    original_sp_df = selected_sp_df.copy()
 
-        # Update Daily Budget column values to Bud Ref * 1.2
-        selected_sp_df['Daily Budget'] = selected_sp_df.apply(lambda row: row['Bud Ref'] * 1.2 if row['Bud Ref'] != 0 else 0, axis=1)
-        selected_sp_df = selected_sp_df.drop(columns=['POB', 'Bud Ref'])
+    # Update Daily Budget column values to Daily Budget * multiplier
+    selected_sp_df['Daily Budget'] = selected_sp_df['Daily Budget'] * multiplier
 
-        return selected_sp_df
-    except Exception as e:
-        st.error(f"Error processing data: {e}")
-        return pd.DataFrame()  # Return an empty DataFrame on error
+    return selected_sp_df, original_sp_df
 
 # Streamlit app
 st.title("SP Campaigns Budget Update")
 st.write("Make sure you upload a 14-day Bulk File")
 
+# Excel reader engine
+reader_engine = engine_selector()
+
+# Output mode
+output_mode = st.radio("Output mode", ["Full rows", "Minimal delta (IDs, Operation and changed fields)"])
+
+# What-if sweep over report days, POB cutoffs and budget multipliers
+with st.expander("What-if sweep"):
+    sweep_enabled = st.checkbox("Sweep a grid of parameters")
+    report_days_text = st.text_input("Report days to sweep", format_grid(REPORT_DAYS))
+    pob_cutoffs_text = st.text_input("POB cutoffs to sweep", format_grid(POB_CUTOFFS))
+    multipliers_text = st.text_input("Budget multipliers to sweep", format_grid(BUDGET_MULTIPLIERS))
+
 # File uploader
-uploaded_file = st.file_uploader("Choose a Bulk file", type="xlsx")
+uploaded_file = st.file_uploader("Choose a Bulk file", type=UPLOAD_TYPES)
+
+# Spool the upload to disk and read it through a memory map
+spooled_file = spool_upload(uploaded_file)
 
 if uploaded_file is not None:
-    # Process the uploaded file
-    selected_sp_df = process_data(uploaded_file)
+    # Load the campaigns of the uploaded file
+    campaign_sp_df = load_campaigns(spooled_file, reader_engine)
+
+    # Parameters of the bulk file, picked from the sweep matrix when the sweep is on
+    report_days, pob_cutoff, multiplier = 14, 0.8, 1.2
+    if sweep_enabled and not campaign_sp_df.empty:
+        try:
+            report_days_grid = parse_grid(report_days_text, positive=True)
+            pob_cutoffs_grid = parse_grid(pob_cutoffs_text)
+            multipliers_grid = parse_grid(multipliers_text)
+        except ValueError as e:
+            st.error(f"Invalid sweep values: {e}")
+        else:
+            sweep_df = budget_sweep(campaign_sp_df, report_days_grid, pob_cutoffs_grid, multipliers_grid)
+
+            st.write("Campaigns updated")
+            st.dataframe(sweep_df.pivot_table(index='Report Days', columns='POB Cutoff', values='Campaigns', aggfunc='first'))
+            st.write("Daily budget change")
+            st.dataframe(sweep_df.pivot_table(index=['Report Days', 'POB Cutoff'], columns='Multiplier', values='Budget Delta', aggfunc='first'))
+
+            # The bulk file is built for the selected cell only
+            report_days = st.selectbox("Sweep cell: Report days", report_days_grid, index=default_index(report_days_grid, report_days), format_func=format_value)
+            pob_cutoff = st.selectbox("Sweep cell: POB cutoff", pob_cutoffs_grid, index=default_index(pob_cutoffs_grid, pob_cutoff), format_func=format_value)
+            multiplier = st.selectbox("Sweep cell: Budget multiplier", multipliers_grid, index=default_index(multipliers_grid, multiplier), format_func=format_value)
+
+    selected_sp_df, original_sp_df = update_budgets(campaign_sp_df, report_days, pob_cutoff, multiplier) if not campaign_sp_df.empty else (campaign_sp_df, campaign_sp_df)
 
     if not selected_sp_df.empty:
        
@@ -78,6 +129,12 @@ if uploaded_file is not None:
 
         processed_data = to_excel(selected_sp_df)
 
+        if output_mode != "Full rows":
+            delta_sp_df = minimal_delta(selected_sp_df, original_sp_df)
+            delta_data = to_excel(delta_sp_df)
+            st.write(delta_report(selected_sp_df, delta_sp_df, len(processed_data), len(delta_data)))
+            processed_data = delta_data
+
         st.download_button(label="Download Bulk File",
                            data=processed_data,
                            file_name='Campaign Bydgets Updated.xlsx',
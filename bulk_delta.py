@@ -0,0 +1,56 @@
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Minimal-delta bulk output: instead of the full original rows with every bulk column,
+# emit only the columns Amazon needs to identify each row plus the fields that changed.
+
+# Columns that identify a row in a Sponsored Products bulk upload
+KEY_COLUMNS = ['Product', 'Entity', 'Operation', 'Campaign ID', 'Ad Group ID', 'Ad ID', 'Keyword ID', 'Product Targeting ID']
+
+# ID columns each entity is identified by, other ID columns are left empty for its rows
+ENTITY_KEYS = {
+    'Campaign': ['Campaign ID'],
+    'Ad Group': ['Campaign ID', 'Ad Group ID'],
+    'Product Ad': ['Campaign ID', 'Ad Group ID', 'Ad ID'],
+    'Keyword': ['Campaign ID', 'Ad Group ID', 'Keyword ID'],
+    'Negative Keyword': ['Campaign ID', 'Ad Group ID', 'Keyword ID'],
+    'Campaign Negative Keyword': ['Campaign ID', 'Keyword ID'],
+    'Product Targeting': ['Campaign ID', 'Ad Group ID', 'Product Targeting ID'],
+    'Negative Product Targeting': ['Campaign ID', 'Ad Group ID', 'Product Targeting ID'],
+}
+
+
+# Function to keep only the key columns and the changed fields of the rows that changed
+def minimal_delta(modified, original, key_columns=KEY_COLUMNS):
+    original = original.reindex(index=modified.index, columns=modified.columns)
+    keys = [column for column in key_columns if column in modified.columns]
+
+    # Cells that differ from the original, treating empty on both sides as equal
+    changed = ~((modified == original) | (modified.isna() & original.isna()))
+    changed = changed.drop(columns=keys)
+    changed_columns = [column for column in changed.columns if changed[column].any()]
+    changed_rows = changed[changed_columns].any(axis=1)
+
+    delta = modified.loc[changed_rows, keys + changed_columns].copy()
+    delta['Operation'] = 'Update'
+
+    # Blank out ID columns the row's entity is not identified by, and drop ID columns left empty
+    if 'Entity' in delta.columns:
+        for column in keys:
+            if column.endswith(' ID'):
+                needed = delta['Entity'].map(lambda entity: column in ENTITY_KEYS.get(entity, [column]))
+                delta[column] = delta[column].where(needed)
+        delta = delta.drop(columns=[column for column in keys if column.endswith(' ID') and delta[column].isna().all()])
+
+    return delta.reset_index(drop=True)
+
+
+# Function to describe the row and byte reduction of the delta output against the full output
+def delta_report(full_df, delta_df, full_bytes, delta_bytes):
+    saved = 1 - delta_bytes / full_bytes if full_bytes else 0
+    return (
+        f"Rows: {len(full_df):,} → {len(delta_df):,}, "
+        f"columns: {len(full_df.columns)} → {len(delta_df.columns)}, "
+        f"file size: {full_bytes:,} → {delta_bytes:,} bytes ({saved:.0%} smaller)"
+    )
@@ -0,0 +1,282 @@
+import argparse
+import gzip
+import importlib.util
+import os
+import sys
+import warnings
+import zipfile
+import streamlit as st
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+parsers = lazy_import('pandas.io.parsers')
+openpyxl = lazy_import('openpyxl')
+pa = lazy_import('pyarrow')
+pa_csv = lazy_import('pyarrow.csv')
+
+# Reader engines for bulk/report XLSX files.
+# 'openpyxl'        - pandas default reader
+# 'openpyxl-stream' - openpyxl read-only workbook, rows streamed as plain values
+# 'calamine'        - Rust-backed reader, used when python-calamine is installed
+# 'auto'            - picks one of the above by file size and availability
+ENGINES = ['auto', 'openpyxl', 'openpyxl-stream', 'calamine']
+
+# Accepted upload types: XLSX, CSV/TSV (optionally gzip-compressed) and ZIP archives with one CSV/TSV per sheet
+UPLOAD_TYPES = ['xlsx', 'csv', 'tsv', 'gz', 'zip']
+
+# Upload types for tools that need several sheets; a single CSV/TSV only holds one
+MULTI_SHEET_UPLOAD_TYPES = ['xlsx', 'zip']
+
+# Files below this size are read with the default engine, the setup cost of the others is not worth it
+SMALL_FILE_BYTES = 2 * 1024 * 1024
+
+
+# Function to check whether the calamine engine can be used
+def calamine_available():
+    return importlib.util.find_spec('python_calamine') is not None
+
+
+# Function to get the size in bytes of an uploaded file, a path or a buffer
+def file_size(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    if getattr(file, 'size', None) is not None:
+        return file.size
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return size
+
+
+# Function to resolve the engine actually used for a file
+def resolve_engine(file, engine='auto'):
+    if engine == 'calamine' and not calamine_available():
+        engine = 'auto'
+    if engine != 'auto':
+        return engine
+
+    if file_size(file) < SMALL_FILE_BYTES:
+        return 'openpyxl'
+    if calamine_available():
+        return 'calamine'
+    return 'openpyxl-stream'
+
+
+# Function to convert a cell value the same way pandas does for openpyxl cells
+def _convert_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# Function to turn a read-only worksheet into a DataFrame, streaming plain row values
+def _worksheet_frame(worksheet):
+    data = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(worksheet.iter_rows(values_only=True)):
+        converted_row = [_convert_value(value) for value in row]
+        # Trim trailing empty cells
+        while converted_row and converted_row[-1] == '':
+            converted_row.pop()
+        if converted_row:
+            last_row_with_data = row_number
+        data.append(converted_row)
+
+    # Trim trailing empty rows and pad to a rectangle
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [''] * (width - len(row)) for row in data]
+
+    return parsers.TextParser(data, header=0).read()
+
+
+# Function to read sheets with openpyxl in read-only mode, loading the workbook once for all of them
+def _read_openpyxl_stream(file, sheet_names):
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        return [
+            _worksheet_frame(workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name])
+            for sheet_name in sheet_names
+        ]
+    finally:
+        workbook.close()
+
+
+# Function to get the lower-cased file name of an uploaded file or a path
+def file_name(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.basename(file).lower()
+    return str(getattr(file, 'name', '')).lower()
+
+
+# Function to pick the delimiter of a CSV/TSV from its name, or from its first line
+def _csv_delimiter(name, stream):
+    if name.endswith('.tsv'):
+        return '\t'
+    if name.endswith('.csv'):
+        return ','
+    if hasattr(stream, 'peek'):
+        head = stream.peek(4096)
+    else:
+        head = stream.read(4096)
+        stream.seek(0)
+    first_line = head.split(b'\n', 1)[0]
+    return '\t' if first_line.count(b'\t') > first_line.count(b',') else ','
+
+
+# Function to align an Arrow-read frame with the dtypes the XLSX path produces
+def _align_csv_frame(df):
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_float_dtype(series) and series.notna().all() and (series % 1 == 0).all():
+            # XLSX stores whole numbers as integers
+            df[column] = series.astype('int64')
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            df[column] = series.astype('datetime64[ns]')
+    return df
+
+
+# Function to read a CSV/TSV stream with the multithreaded Arrow reader
+def _read_csv(stream, name):
+    delimiter = _csv_delimiter(name, stream)
+    table = pa_csv.read_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+    )
+    # Columns empty throughout come back as Arrow nulls, XLSX reads them as float NaN
+    table = table.cast(pa.schema([field.with_type(pa.float64()) if pa.types.is_null(field.type) else field for field in table.schema]))
+    return _align_csv_frame(table.to_pandas(date_as_object=False))
+
+
+# Function to find the archive member holding a sheet: first member for 0, else matched by file name
+def _zip_member(archive, sheet_name):
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith('__MACOSX')
+        and info.filename.lower().endswith(('.csv', '.tsv', '.txt', '.gz'))
+    ]
+    if isinstance(sheet_name, int):
+        if -len(members) <= sheet_name < len(members):
+            return members[sheet_name]
+        raise ValueError(
+            f"Worksheet index {sheet_name} not found, the ZIP holds {len(members)} sheet file(s) "
+            "(.csv, .tsv, .txt or .gz members)"
+        )
+    for info in members:
+        stem = os.path.basename(info.filename).split('.')[0]
+        if stem.strip().lower() == sheet_name.strip().lower():
+            return info
+    raise ValueError(f"Worksheet named '{sheet_name}' not found, the ZIP has no .csv, .tsv, .txt or .gz member named after it")
+
+
+# Function to read one sheet from a CSV/TSV, a gzip-compressed CSV/TSV or a ZIP with one file per sheet
+def _read_text_sheet(file, sheet_name):
+    name = file_name(file)
+
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(file) as archive:
+            info = _zip_member(archive, sheet_name)
+            with archive.open(info) as member:
+                member_name = info.filename.lower()
+                if member_name.endswith('.gz'):
+                    with gzip.GzipFile(fileobj=member) as stream:
+                        return _read_csv(stream, member_name[:-3])
+                return _read_csv(member, member_name)
+
+    # A single CSV/TSV holds exactly one sheet, whatever sheet name the tool asks for
+    if name.endswith('.gz'):
+        with gzip.open(file) as stream:
+            return _read_csv(stream, name[:-3])
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as stream:
+            return _read_csv(stream, name)
+    return _read_csv(file, name)
+
+
+# Function to read one sheet of an uploaded bulk/report file with the selected engine
+def read_sheet(file, sheet_name=0, engine='auto'):
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    if file_name(file).endswith(('.csv', '.tsv', '.txt', '.gz', '.zip')):
+        return _read_text_sheet(file, sheet_name)
+
+    engine = resolve_engine(file, engine)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    if engine == 'openpyxl-stream':
+        return _read_openpyxl_stream(file, [sheet_name])[0]
+    if engine == 'calamine':
+        try:
+            return pd.read_excel(file, sheet_name=sheet_name, engine='calamine')
+        except (ImportError, ValueError) as e:
+            # pandas older than 2.2 has no calamine engine; a missing sheet is a real error
+            if 'calamine' not in str(e):
+                raise
+            if hasattr(file, 'seek'):
+                file.seek(0)
+    return pd.read_excel(file, sheet_name=sheet_name, engine='openpyxl')
+
+
+# Function to read several sheets of one file, opening an XLSX workbook only once
+def read_sheets(file, sheet_names, engine='auto'):
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    name = file_name(file)
+    if name.endswith(('.csv', '.tsv', '.txt', '.gz', '.zip')):
+        if not name.endswith('.zip') and len(set(sheet_names)) > 1:
+            raise ValueError(
+                f"A CSV/TSV file holds a single sheet, but the sheets {', '.join(map(str, sheet_names))} are needed; "
+                "upload the XLSX workbook or a ZIP with one CSV/TSV per sheet"
+            )
+        return [read_sheet(file, sheet_name) for sheet_name in sheet_names]
+
+    engine = resolve_engine(file, engine)
+    if engine == 'openpyxl-stream':
+        return _read_openpyxl_stream(file, sheet_names)
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    try:
+        workbook = pd.ExcelFile(file, engine=engine)
+    except (ImportError, ValueError) as e:
+        # Same calamine fallback as read_sheet
+        if engine != 'calamine' or 'calamine' not in str(e):
+            raise
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        workbook = pd.ExcelFile(file, engine='openpyxl')
+    with workbook:
+        return [workbook.parse(sheet_name) for sheet_name in sheet_names]
+
+
+# Function to get the default engine from the command line (streamlit run app.py -- --reader calamine)
+# or the BULK_READER environment variable; an unknown engine falls back to 'auto' with a warning
+def default_engine():
+    parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
+    parser.add_argument('--reader', default=os.environ.get('BULK_READER', 'auto'))
+    try:
+        args, _ = parser.parse_known_args(sys.argv[1:])
+    except argparse.ArgumentError as e:
+        warnings.warn(f"{e}, using the 'auto' reader")
+        return 'auto'
+    if args.reader not in ENGINES:
+        warnings.warn(f"Unknown reader '{args.reader}', expected one of {', '.join(ENGINES)}; using 'auto'")
+        return 'auto'
+    return args.reader
+
+
+# Function to show the reader engine option in the sidebar
+def engine_selector():
+    engine = st.sidebar.selectbox("Excel reader", ENGINES, index=ENGINES.index(default_engine()))
+    if engine == 'calamine' and not calamine_available():
+        st.sidebar.caption("calamine is not installed, falling back to automatic selection")
+    return engine
@@ -1,6 +1,15 @@
-import pandas as pd
 import streamlit as st
 from io import BytesIO
+from bulk_io import read_sheets, engine_selector, MULTI_SHEET_UPLOAD_TYPES
+from uploads import spool_upload
+from targeting import classify_targeting
+from lazy_imports import lazy_import
+from warmup import start_warm_up
+
+pd = lazy_import('pandas')
+
+# Preload heavy modules in the background while the first page is shown
+start_warm_up()
 
 # Define functions
 def filter_enabled(df, column_names):
@@ -11,14 +20,6 @@ def filter_enabled(df, column_names):
     filtered_df.reset_index(drop=True, inplace=True)
     return filtered_df
 
-def filter_keywords(df, column_names):
-    keywords_only_df = df.copy()
-    for column in column_names:
-        if column in df.columns:
-            keywords_only_df = keywords_only_df[keywords_only_df[column].str.lower() == 'keyword']
-    keywords_only_df.reset_index(drop=True, inplace=True)
-    return keywords_only_df
-
 def create_comparison_df(sp_performing_keywords_only_df, sb_keywords_only_df):
     sp_keywords = set(sp_performing_keywords_only_df['Keyword Text'])
     sb_keywords = set(sb_keywords_only_df['Keyword Text'])
@@ -50,14 +51,23 @@ st.title('Growth Opportunities: Keywords')
 # Input target ACOS
 target_acos = st.number_input('Enter target ACOS:', min_value=0.0, max_value=1.0, step=0.01, value=0.25)
 
+# Excel reader engine
+reader_engine = engine_selector()
+
 # File upload
-uploaded_file = st.file_uploader('Upload the bulk file', type=['xlsx'])
+uploaded_file = st.file_uploader('Upload the bulk file', type=MULTI_SHEET_UPLOAD_TYPES)
+
+# Spool the upload to disk and read it through a memory map
+spooled_file = spool_upload(uploaded_file)
 
 if uploaded_file:
     try:
         # Read the uploaded Excel file
-        sp_df = pd.read_excel(uploaded_file, sheet_name='Sponsored Products Campaigns')
-        sb_df = pd.read_excel(uploaded_file, sheet_name='Sponsored Brands Campaigns')
+        sp_df, sb_df = read_sheets(spooled_file, ['Sponsored Products Campaigns', 'Sponsored Brands Campaigns'], reader_engine)
+
+        # Keep keyword rows only
+        sp_df = sp_df[sp_df['Entity'].str.lower() == 'keyword'].copy()
+        sb_df = sb_df[sb_df['Entity'].str.lower() == 'keyword']
 
         # Convert 'Units' and 'ACOS' columns to numeric, handling errors gracefully
         sp_df['Units'] = pd.to_numeric(sp_df['Units'], errors='coerce')
@@ -73,12 +83,11 @@ if uploaded_file:
         # Ensure 'Keyword Text' column is treated as strings and handle NaNs
         filtered_sp_df['Keyword Text'] = filtered_sp_df['Keyword Text'].astype(str).fillna('')
 
-        # Filter out keywords containing '+'
-        filtered_sp_df = filtered_sp_df[~filtered_sp_df['Keyword Text'].str.contains('\+')]
+        # Filter out broad-modifier keywords ('+')
+        filtered_sp_df = filtered_sp_df[classify_targeting(filtered_sp_df['Keyword Text']) != 'broad-modifier']
 
-        # Apply the filter_keywords function to filtered DataFrames
-        sp_keywords_only_df = filter_keywords(filtered_sp_df, ['Entity'])
-        sb_keywords_only_df = filter_keywords(filtered_sb_df, ['Entity'])
+        sp_keywords_only_df = filtered_sp_df.reset_index(drop=True)
+        sb_keywords_only_df = filtered_sb_df
 
         # Filtering performing keywords based on 'Units' and 'ACOS'
         sp_performing_keywords_only_df = sp_keywords_only_df[(sp_keywords_only_df['Units'] >= 2) & (sp_keywords_only_df['ACOS'] < target_acos)]
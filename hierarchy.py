@@ -0,0 +1,46 @@
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Entity index built once from a bulk sheet, for tools that look rows up by entity type several times.
+# Rows are grouped by Entity into offset arrays over a single stable row ordering,
+# so a lookup costs O(result) instead of a scan of the full sheet.
+
+
+class BulkHierarchy:
+
+    def __init__(self, df, entity_column='Entity'):
+        self.df = df
+
+        # Entity -> row positions, rows without an Entity go to a last bucket no lookup returns
+        entity_codes, self.entities = pd.factorize(df[entity_column])
+        self._entity_lookup = {entity: code for code, entity in enumerate(self.entities)}
+        n_entity_groups = len(self.entities) + 1
+        entity_codes = np.where(entity_codes < 0, n_entity_groups - 1, entity_codes)
+        self._entity_order, self._entity_offsets = self._group_offsets(entity_codes, n_entity_groups)
+
+    # Function to order row positions by group code and return the group offsets into that order
+    @staticmethod
+    def _group_offsets(codes, n_groups):
+        order = np.argsort(codes, kind='stable')
+        offsets = np.zeros(n_groups + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=n_groups), out=offsets[1:])
+        return order, offsets
+
+    # Function to get the row positions of an entity type
+    def rows(self, entity):
+        code = self._entity_lookup.get(entity)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self._entity_order[self._entity_offsets[code]:self._entity_offsets[code + 1]]
+
+    # Function to get the rows of an entity type, in sheet order and with the original index
+    def entity_frame(self, entity):
+        return self.df.iloc[self.rows(entity)]
+
+    # Function to get the best selling SKU per portfolio from the Product Ad rows
+    def best_sku_per_portfolio(self, keys=('Portfolio ID', 'Portfolio Name (Informational only)'), sales_column='Sales'):
+        product_ads = self.df.iloc[self.rows('Product Ad')][list(keys) + ['SKU', sales_column]]
+        product_ads = product_ads.dropna(subset=['SKU', sales_column])
+        return product_ads.loc[product_ads.groupby(list(keys))[sales_column].idxmax()]
@@ -0,0 +1,44 @@
+import importlib
+import sys
+import threading
+
+# Heavy modules (pandas, numpy, ...) are bound at module level through lazy_import, so the
+# apps render their first page without paying for them; the real import happens on first use.
+
+# Held while a heavy module is first imported: importing pandas from two threads at once
+# (the warm-up thread and a script run) can fail half-way through its C extensions
+_import_lock = threading.RLock()
+
+
+# Function to import a module, one thread at a time
+def import_module(name):
+    with _import_lock:
+        return importlib.import_module(name)
+
+
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+# Function to bind a module that is imported on first attribute access instead of at import time
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+# Function to check whether a module has actually been imported
+def is_loaded(name):
+    return name in sys.modules
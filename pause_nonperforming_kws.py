@@ -1,16 +1,32 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
+from bulk_io import read_sheet, engine_selector, UPLOAD_TYPES
+from uploads import spool_upload
+from bulk_delta import minimal_delta, delta_report
+from sweep import pause_sweep, parse_grid, format_grid, format_value, default_index, SPEND_THRESHOLDS, ACOS_THRESHOLDS
+from lazy_imports import lazy_import
+from warmup import start_warm_up
 
-# Function to process the data
-def process_excel(file, additional_spend, additional_acos):
+pd = lazy_import('pandas')
+
+# Preload heavy modules in the background while the first page is shown
+start_warm_up()
+
+# Function to load the Keyword rows of the bulk file
+def load_keywords(file, reader_engine='auto'):
     try:
         # Read the "Sponsored Products Campaigns" sheet into a DataFrame
-        sp_df = pd.read_excel(file, sheet_name='Sponsored Products Campaigns')
+        sp_df = read_sheet(file, 'Sponsored Products Campaigns', reader_engine)
 
         # Filter the DataFrame to only include rows where 'Entity' is 'Keyword'
-        filtered_sp_df = sp_df[sp_df['Entity'] == 'Keyword']
+        return sp_df[sp_df['Entity'] == 'Keyword']
+    except Exception as e:
+        st.error(f"An error occurred while processing the file: {e}")
+        return None
 
+# Function to select the keywords to pause
+def select_keywords_to_pause(filtered_sp_df, additional_spend, additional_acos):
+    try:
         # Automatically extract keywords with Units == 0 and Spend > 0
         auto_filtered_sp_df = filtered_sp_df[(filtered_sp_df['Units'] == 0) & 
                                              (filtered_sp_df['Spend'] > 0)]
@@ -31,14 +47,17 @@ def process_excel(file, additional_spend, additional_acos):
         # Remove duplicates
         combined_filtered_df = combined_filtered_df.drop_duplicates()
 
+        # Keep the rows as they were before the update for the minimal-delta output
+        original_df = combined_filtered_df.copy()
+
         # Set 'Operation' column to 'Update' and 'State' column to 'paused'
         combined_filtered_df['Operation'] = 'Update'
         combined_filtered_df['State'] = 'paused'
 
-        return combined_filtered_df
+        return combined_filtered_df, original_df
     except Exception as e:
         st.error(f"An error occurred while processing the file: {e}")
-        return None
+        return None, None
 
 # Function to convert DataFrame to Excel for download
 def to_excel(df):
@@ -54,7 +73,7 @@ st.write("""
 This app automatically extracts spending keywords with zero sales.<br>
 Upon processing, the app creates an output file ready for uploading via Ad Console.<br><br>
 
-Input file - Bulk Report XLSX <br>
+Input file - Bulk Report XLSX or CSV/TSV <br>
 Required sheets - SP Campaigns<br><br>
 
 For more sophisticated scenarios, use the inputs below to select additional keywords to pause.<br><br>
@@ -65,12 +84,50 @@ For more sophisticated scenarios, use the inputs below to select additional keyw
 additional_spend_input = st.number_input("Minimum Spend", min_value=0.0, value=0.0)
 additional_acos_input = st.number_input("Target ACOS (%)", min_value=0.0, value=0.0)
 
+# Excel reader engine
+reader_engine = engine_selector()
+
+# What-if sweep over minimum spend and target ACOS
+with st.expander("What-if sweep"):
+    sweep_enabled = st.checkbox("Sweep a grid of thresholds")
+    spend_thresholds_text = st.text_input("Minimum Spend values to sweep", format_grid(SPEND_THRESHOLDS))
+    acos_thresholds_text = st.text_input("Target ACOS (%) values to sweep", format_grid(ACOS_THRESHOLDS))
+
+# Output mode
+output_mode = st.radio("Output mode", ["Full rows", "Minimal delta (IDs, Operation and changed fields)"])
+
 # File uploader
-uploaded_file = st.file_uploader("Upload Amazon Bulk File", type="xlsx")
+uploaded_file = st.file_uploader("Upload Amazon Bulk File", type=UPLOAD_TYPES)
+
+# Spool the upload to disk and read it through a memory map
+spooled_file = spool_upload(uploaded_file)
 
 if uploaded_file is not None:
+    # Load the keywords of the uploaded file
+    keyword_df = load_keywords(spooled_file, reader_engine)
+
+    # Thresholds of the bulk file, picked from the sweep matrix when the sweep is on
+    additional_spend, additional_acos = additional_spend_input, additional_acos_input
+    if sweep_enabled and keyword_df is not None:
+        try:
+            spend_thresholds = parse_grid(spend_thresholds_text)
+            acos_thresholds = parse_grid(acos_thresholds_text)
+        except ValueError as e:
+            st.error(f"Invalid sweep values: {e}")
+        else:
+            sweep_df = pause_sweep(keyword_df, spend_thresholds, acos_thresholds)
+
+            st.write("Keywords paused")
+            st.dataframe(sweep_df.pivot_table(index='Minimum Spend', columns='Target ACOS (%)', values='Keywords', aggfunc='first'))
+            st.write("Spend of the paused keywords")
+            st.dataframe(sweep_df.pivot_table(index='Minimum Spend', columns='Target ACOS (%)', values='Spend', aggfunc='first'))
+
+            # The bulk file is built for the selected cell only
+            additional_spend = st.selectbox("Sweep cell: Minimum Spend", spend_thresholds, index=default_index(spend_thresholds, additional_spend), format_func=format_value)
+            additional_acos = st.selectbox("Sweep cell: Target ACOS (%)", acos_thresholds, index=default_index(acos_thresholds, additional_acos), format_func=format_value)
+
     # Process the uploaded file
-    result_df = process_excel(uploaded_file, additional_spend_input, additional_acos_input)
+    result_df, original_df = select_keywords_to_pause(keyword_df, additional_spend, additional_acos) if keyword_df is not None else (None, None)
     
     if result_df is not None and not result_df.empty:
         # Display the first few rows of the result
@@ -78,10 +135,18 @@ if uploaded_file is not None:
         st.dataframe(result_df.head())
         
         # Provide download link for the processed file
+        processed_data = to_excel(result_df)
+
+        if output_mode != "Full rows":
+            delta_df = minimal_delta(result_df, original_df)
+            delta_data = to_excel(delta_df)
+            st.write(delta_report(result_df, delta_df, len(processed_data), len(delta_data)))
+            processed_data = delta_data
+
         st.write("Download the processed file:")
         st.download_button(
             label="Download Excel file",
-            data=to_excel(result_df),
+            data=processed_data,
             file_name="Keywords to pause.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -0,0 +1,134 @@
+import streamlit as st
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Server-side preview for large outputs: the full frame stays in this process and
+# only the visible page is sent to the browser, so preview cost does not grow with output size.
+# The preview runs as a fragment: paging, search, filter and sort rerun only the preview,
+# not the script that built the output.
+
+CAMPAIGN_COLUMNS = ['Campaign Name', 'Campaign Name (Informational only)', 'Campaign ID']
+
+
+# Function to pick the first column from candidates that is present in df
+def first_present(df, candidates):
+    for column in candidates:
+        if column in df.columns:
+            return column
+    return None
+
+
+# Function to compute the summary header shown above a bulk output preview
+def summarize_output(df, budget_before=None):
+    summary = {'Rows': len(df)}
+
+    if 'Entity' in df.columns:
+        summary['Rows by Entity'] = df['Entity'].value_counts().rename_axis('Entity').reset_index(name='Rows')
+
+    if 'Daily Budget' in df.columns:
+        campaign_rows = df['Entity'] == 'Campaign' if 'Entity' in df.columns else pd.Series(True, index=df.index)
+        budget_after = pd.to_numeric(df.loc[campaign_rows, 'Daily Budget'], errors='coerce').sum()
+        if budget_before is None:
+            budget_before = 0
+        else:
+            budget_before = pd.to_numeric(pd.Series(budget_before), errors='coerce').sum()
+        summary['Total budget change'] = round(budget_after - budget_before, 2)
+
+    campaign_column = first_present(df, CAMPAIGN_COLUMNS)
+    if 'Entity' in df.columns and campaign_column is not None:
+        keyword_rows = df[df['Entity'] == 'Keyword']
+        summary['Keywords per campaign'] = keyword_rows.groupby(campaign_column).size().rename_axis('Campaign').reset_index(name='Keywords')
+
+    return summary
+
+
+# Function to render the summary header
+def show_summary(summary):
+    metrics = {name: value for name, value in summary.items() if not isinstance(value, pd.DataFrame)}
+    columns = st.columns(len(metrics))
+    for column, (name, value) in zip(columns, metrics.items()):
+        column.metric(name, f"{value:,}")
+
+    tables = {name: value for name, value in summary.items() if isinstance(value, pd.DataFrame)}
+    if tables:
+        columns = st.columns(len(tables))
+        for column, (name, table) in zip(columns, tables.items()):
+            column.write(name)
+            column.dataframe(table, hide_index=True, height=min(35 * (len(table) + 1) + 3, 250))
+
+
+# Function to build the sort key of a column; bulk columns such as Bid or Daily Budget mix numbers
+# and '', so columns whose filled cells are mostly numbers sort as numbers (blanks last) and other
+# mixed columns as text
+def sort_key(values):
+    if values.dtype != object:
+        return values
+    numeric = pd.to_numeric(values, errors='coerce')
+    filled = values.notna() & values.astype(str).str.strip().ne('')
+    if numeric.notna().sum() * 2 >= filled.sum():
+        return numeric
+    return values.astype(str).where(values.notna())
+
+
+# Function to apply search, filter and sort on the server side
+def filter_sort(df, search='', filter_column=None, filter_values=None, sort_column=None, ascending=True):
+    view = df
+
+    if filter_column is not None and filter_values:
+        view = view[view[filter_column].astype(str).isin(filter_values)]
+
+    if search:
+        text_columns = view.select_dtypes(include=['object', 'string', 'category']).columns
+        mask = pd.Series(False, index=view.index)
+        for column in text_columns:
+            mask |= view[column].astype(str).str.contains(search, case=False, regex=False, na=False)
+        view = view[mask]
+
+    if sort_column:
+        view = view.sort_values(by=sort_column, ascending=ascending, kind='stable', na_position='last', key=sort_key)
+
+    return view
+
+
+# Function to get the positions of the rows of df left by filter_sort, in display order
+def view_positions(df, search='', filter_column=None, filter_values=None, sort_column=None, ascending=True):
+    positioned = df.set_axis(pd.RangeIndex(len(df)), axis=0, copy=False)
+    return filter_sort(positioned, search, filter_column, filter_values, sort_column, ascending).index.to_numpy()
+
+
+# Function to render a paginated preview of df, sending only the current page to the browser
+@st.fragment
+def show_preview(df, key, summary=None, filter_column='Entity', page_size=50):
+    if summary is not None:
+        show_summary(summary)
+
+    if filter_column not in df.columns:
+        filter_column = None
+
+    search_col, filter_col, sort_col, order_col = st.columns([3, 3, 3, 1])
+    search = search_col.text_input("Search", key=f"{key}_search")
+    filter_values = []
+    if filter_column is not None:
+        options = sorted(df[filter_column].dropna().astype(str).unique())
+        filter_values = filter_col.multiselect(filter_column, options, key=f"{key}_filter")
+    sort_column = sort_col.selectbox("Sort by", [''] + list(df.columns), key=f"{key}_sort")
+    ascending = order_col.checkbox("Asc", value=True, key=f"{key}_asc")
+
+    # Search, filter and sort only run again when one of them or the frame changes; paging slices the stored positions
+    settings = (search, tuple(filter_values), sort_column, ascending)
+    stored = st.session_state.get(f"{key}_rows")
+    if stored is None or stored[0] is not df or stored[1] != settings:
+        stored = (df, settings, view_positions(df, search, filter_column, filter_values, sort_column, ascending))
+        st.session_state[f"{key}_rows"] = stored
+    positions = stored[2]
+
+    pages = max((len(positions) - 1) // page_size + 1, 1)
+    # Reset the page when filtering leaves fewer pages than the one selected
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    start = (int(page) - 1) * page_size
+
+    st.dataframe(df.iloc[positions[start:start + page_size]])
+    st.caption(f"Showing rows {min(start + 1, len(positions))}-{min(start + page_size, len(positions))} of {len(positions):,}, page {int(page)} of {pages} (filtered from {len(df):,})")
@@ -0,0 +1,110 @@
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# What-if parameter sweeps for budget_update and pause_nonperforming_kws.
+# The campaign / keyword columns are taken once as NumPy arrays and every combination of
+# parameters is evaluated in a single broadcast computation, grid axes first and rows last,
+# so trying other thresholds does not re-run the pipeline per combination.
+
+# Default grids shown in the sweep inputs
+REPORT_DAYS = [7, 14, 30]
+POB_CUTOFFS = [0.6, 0.7, 0.8, 0.9]
+BUDGET_MULTIPLIERS = [1.1, 1.2, 1.3, 1.5]
+SPEND_THRESHOLDS = [0.0, 5.0, 10.0, 20.0, 50.0]
+ACOS_THRESHOLDS = [0.0, 30.0, 50.0, 80.0, 100.0]
+
+
+# Function to turn a comma-separated list of numbers into a sorted grid axis
+def parse_grid(text, positive=False):
+    try:
+        values = sorted({float(value) for value in text.split(',') if value.strip()})
+    except ValueError:
+        raise ValueError(f"'{text}' is not a comma-separated list of numbers")
+    if not values:
+        raise ValueError("at least one value is needed")
+    if values[0] < 0 or (positive and values[0] == 0):
+        raise ValueError(f"'{text}' must only contain {'positive' if positive else 'non-negative'} numbers")
+    return values
+
+
+# Function to format one grid value without trailing zeros
+def format_value(value):
+    return f"{value:g}"
+
+
+# Function to format a grid axis for the sweep inputs
+def format_grid(values):
+    return ', '.join(format_value(value) for value in values)
+
+
+# Function to pick the position of the current setting in a grid axis, or its first value
+def default_index(values, default):
+    return values.index(default) if default in values else 0
+
+
+# Function to compute the percent of budget spent per day, Spend / report days / Daily Budget,
+# for every report-day count in report_days (leading axes) and every campaign (last axis)
+def percent_of_budget(spend, daily_budget, report_days):
+    spend = np.asarray(spend, dtype=float)
+    daily_budget = np.asarray(daily_budget, dtype=float)
+    report_days = np.asarray(report_days, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pob = spend / report_days[..., None] / daily_budget
+    return np.where(daily_budget != 0, pob, 0.0)
+
+
+# Function to evaluate every report days x POB cutoff x multiplier combination of the budget update
+def budget_sweep(campaign_df, report_days, pob_cutoffs, multipliers):
+    report_days = np.asarray(report_days, dtype=float)
+    pob_cutoffs = np.asarray(pob_cutoffs, dtype=float)
+    multipliers = np.asarray(multipliers, dtype=float)
+    daily_budget = campaign_df['Daily Budget'].to_numpy(dtype=float)
+
+    # (days, campaigns) -> (days, cutoffs, campaigns)
+    pob = percent_of_budget(campaign_df['Spend'].to_numpy(dtype=float), daily_budget, report_days)
+    selected = pob[:, None, :] >= pob_cutoffs[None, :, None]
+    campaigns = selected.sum(axis=-1)
+    current_budget = np.where(selected, daily_budget, 0.0).sum(axis=-1)
+
+    # Budgets are multiplied, so the delta of each multiplier is the selected budget times (multiplier - 1)
+    budget_delta = current_budget[:, :, None] * (multipliers - 1)
+
+    days_axis, cutoff_axis, multiplier_axis = np.meshgrid(report_days, pob_cutoffs, multipliers, indexing='ij')
+    return pd.DataFrame({
+        'Report Days': days_axis.ravel(),
+        'POB Cutoff': cutoff_axis.ravel(),
+        'Multiplier': multiplier_axis.ravel(),
+        'Campaigns': np.broadcast_to(campaigns[:, :, None], budget_delta.shape).ravel(),
+        'Current Budget': np.broadcast_to(current_budget[:, :, None], budget_delta.shape).ravel().round(2),
+        'Budget Delta': budget_delta.ravel().round(2),
+    })
+
+
+# Function to evaluate every minimum spend x target ACOS combination of the keyword pause
+def pause_sweep(keyword_df, spend_thresholds, acos_thresholds):
+    spend_thresholds = np.asarray(spend_thresholds, dtype=float)
+    acos_thresholds = np.asarray(acos_thresholds, dtype=float)
+    units = keyword_df['Units'].to_numpy(dtype=float)
+    spend = keyword_df['Spend'].to_numpy(dtype=float)
+    acos = keyword_df['ACOS'].to_numpy(dtype=float)
+
+    # Spending keywords without sales are paused by every combination
+    no_sales = (units == 0) & (spend > 0)
+
+    # (spend thresholds, ACOS thresholds, keywords); the extra filter only applies when a threshold is set
+    over_thresholds = (units > 0) & (spend > spend_thresholds[:, None, None]) & (acos > acos_thresholds[None, :, None] / 100.0)
+    active = (spend_thresholds[:, None] > 0) | (acos_thresholds[None, :] > 0)
+    selected = no_sales | (over_thresholds & active[:, :, None])
+
+    # Identical rows are paused once, as drop_duplicates does on the bulk output
+    selected &= ~keyword_df.duplicated().to_numpy()
+
+    spend_axis, acos_axis = np.meshgrid(spend_thresholds, acos_thresholds, indexing='ij')
+    return pd.DataFrame({
+        'Minimum Spend': spend_axis.ravel(),
+        'Target ACOS (%)': acos_axis.ravel(),
+        'Keywords': selected.sum(axis=-1).ravel(),
+        'Spend': np.where(selected, spend, 0.0).sum(axis=-1).ravel().round(2),
+    })
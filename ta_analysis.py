@@ -1,17 +1,29 @@
 #streamlit run ta_analysis_new.py
 import streamlit as st
-import pandas as pd
 import warnings
-from datetime import timedelta
 from io import BytesIO
+from preview import summarize_output, show_preview
+from bulk_io import read_sheet, engine_selector, UPLOAD_TYPES
+from uploads import spool_upload
+from ta_reports import build_review_sheet, build_portfolio_sheets, build_spend_tracking_sheet
+from ta_parallel import aggregate_parallel
+from ta_export import unique_names, to_zip, adjust_column_widths, SUMMARY_SHEETS
+from targeting import classify_targeting
+from lazy_imports import lazy_import
+from warmup import start_warm_up
+
+pd = lazy_import('pandas')
+
+# Preload heavy modules in the background while the first page is shown
+start_warm_up()
 
 # Suppress the specific UserWarning from openpyxl
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 # Data cleaning function with correct calculations for CTR and ACOS
-def clean_amazon_data(file):
+def clean_amazon_data(file, reader_engine='auto'):
     try:
-        amazon_data = pd.read_excel(file)
+        amazon_data = read_sheet(file, 0, reader_engine)
         amazon_data.columns = amazon_data.columns.str.strip()
         amazon_data['Date'] = pd.to_datetime(amazon_data['Date'])
         amazon_data.fillna(0, inplace=True)
@@ -42,12 +54,9 @@ def clean_amazon_data(file):
 
         amazon_data = amazon_data[amazon_data['Ad Spend'] > 0]
 
-        exclude_targeting = ['loose-match', 'close-match', 'complements', 'substitutes']
-        amazon_data = amazon_data[~amazon_data['Targeting'].isin(exclude_targeting)]
-
-        exclude_keywords = ['category', 'B0']
-        pattern = '|'.join(exclude_keywords)
-        amazon_data = amazon_data[~amazon_data['Targeting'].str.contains(pattern, case=False, na=False)]
+        # Keep keyword targets only, dropping auto, ASIN and category targeting
+        targeting_type = classify_targeting(amazon_data['Targeting'])
+        amazon_data = amazon_data[targeting_type.isin(['keyword', 'broad-modifier'])]
 
         amazon_data.reset_index(drop=True, inplace=True)
         
@@ -58,186 +67,32 @@ def clean_amazon_data(file):
         return pd.DataFrame()
 
 # Function to create the 'Review' sheet
-def create_review_sheet(cleaned_data):
+def create_review_sheet(cleaned_data, end_date=None):
     try:
-        end_date = cleaned_data['Date'].max()
-        start_date = end_date - timedelta(weeks=6)
-        recent_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= end_date)]
-        
-        ad_spend = recent_data.groupby(['Portfolio', pd.Grouper(key='Date', freq='W-SUN')])['Ad Spend'].sum().unstack(fill_value=0)
-        ad_sales = recent_data.groupby(['Portfolio', pd.Grouper(key='Date', freq='W-SUN')])['Ad Sales'].sum().unstack(fill_value=0)
-        acos = (ad_spend / ad_sales).replace([float('inf'), -float('inf'), pd.NA], 0).round(2)
-        
-        review_data = pd.concat([ad_spend, acos], axis=1, keys=['Spend', 'ACOS'])
-        review_data.columns = [f"{col[1].strftime('%m-%d-%Y')} {col[0]}" for col in review_data.columns]
-        
-        columns = ['Portfolio']
-        dates = sorted(set(col.split()[0] for col in review_data.columns))
-
-        # Add Spend columns first
-        for date in dates:
-            columns.append(f"{date} Spend")
-        
-        # Add ACOS columns after Spend columns
-        for date in dates:
-            columns.append(f"{date} ACOS")
-        
-        review_data = review_data.reset_index()
-        review_data = review_data[columns]
-        
-        last_week_col = [col for col in review_data.columns if 'Spend' in col][-1]
-        review_data.sort_values(by=last_week_col, ascending=False, inplace=True)
-        
-        return review_data
-
+        return build_review_sheet(cleaned_data, end_date)
     except Exception as e:
         st.error(f"Error in creating review sheet: {e}")
         return pd.DataFrame()
 
 # Function to create individual portfolio sheets with Ad Sales, Ad Spend, and ACOS columns
-def create_portfolio_sheets(cleaned_data):
+def create_portfolio_sheets(cleaned_data, end_date=None):
     try:
-        portfolio_sheets = {}
-
-        end_date = cleaned_data['Date'].max()
-        start_date = end_date - timedelta(weeks=6)
-        recent_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= end_date)]
-
-        portfolios = recent_data['Portfolio'].unique()
-
-        for portfolio in portfolios:
-            try:
-                portfolio_data = recent_data[recent_data['Portfolio'] == portfolio]
-
-                portfolio_sheet = portfolio_data.groupby(['Targeting', pd.Grouper(key='Date', freq='W-SUN')]).agg(
-                    Ad_Sales=('Ad Sales', 'sum'),
-                    Ad_Spend=('Ad Spend', 'sum'),
-                    ACOS=('ACOS', 'mean')  # Assuming you want to average the ACOS over the week
-                ).unstack(fill_value=0)
-
-                portfolio_sheet.columns = ['_'.join([col[0], col[1].strftime('%m-%d-%Y')]) for col in portfolio_sheet.columns]
-                portfolio_sheet.reset_index(inplace=True)
-
-                # Collect all the unique dates present in the columns
-                dates = sorted(set(col.split('_')[1] for col in portfolio_sheet.columns if '_' in col))
-
-                for date in dates:
-                    spend_col = f'Ad_Spend_{date}'
-                    sales_col = f'Ad_Sales_{date}'
-                    acos_col = f'ACOS_{date}'
-
-                    # Add the Spend and ACOS columns if they don't already exist
-                    if spend_col in portfolio_sheet.columns:
-                        portfolio_sheet[f'Spend_{date}'] = portfolio_sheet[spend_col]
-                    if acos_col in portfolio_sheet.columns:
-                        portfolio_sheet[f'ACOS_{date}'] = portfolio_sheet[acos_col]
-
-                columns_to_keep = ['Targeting'] + [col for col in portfolio_sheet.columns if 'Ad_Sales' in col or 'Spend' in col or 'ACOS' in col]
-                portfolio_sheet = portfolio_sheet[columns_to_keep]
-
-                portfolio_sheets[portfolio] = portfolio_sheet
-
-            except Exception as e:
-                st.error(f"Error processing portfolio {portfolio}: {e}")
-
+        portfolio_sheets, errors = build_portfolio_sheets(cleaned_data, end_date)
+        for error in errors:
+            st.error(error)
         return portfolio_sheets
-
     except Exception as e:
         st.error(f"Error in creating portfolio sheets: {e}")
         return {}
 
 # Function to create the 'Spend Tracking' sheet with adjusted calculations
-def create_spend_tracking_sheet(cleaned_data):
+def create_spend_tracking_sheet(cleaned_data, end_date=None):
     try:
-        end_date = cleaned_data['Date'].max()
-        start_date = end_date - timedelta(weeks=5)
-        last_week_start = end_date - timedelta(weeks=1)
-        last_week_end = end_date
-
-        # Data for the prior 4 weeks excluding the last week
-        prior_4_weeks_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= last_week_start)].copy()
-        # Data for the last week
-        last_week_data = cleaned_data[(cleaned_data['Date'] > last_week_start) & (cleaned_data['Date'] <= last_week_end)].copy()
-
-        # Add a new column to indicate the week
-        prior_4_weeks_data.loc[:, 'Week'] = prior_4_weeks_data['Date'].dt.isocalendar().week
-        last_week_data.loc[:, 'Week'] = last_week_data['Date'].dt.isocalendar().week
-
-        # Group by Portfolio, Campaign Name, Targeting, and Week to calculate total spend, sales, and CPC
-        spend_by_keyword = prior_4_weeks_data.groupby(['Portfolio', 'Campaign Name', 'Targeting', 'Week']).agg(
-            weekly_spend=('Ad Spend', 'sum'),
-            weekly_sales=('Ad Sales', 'sum'),
-            weekly_cpc=('CPC', 'mean')
-        ).reset_index()
-
-        # Calculate the number of weeks active and the total spend per keyword
-        spend_summary = spend_by_keyword.groupby(['Portfolio', 'Campaign Name', 'Targeting']).agg(
-            total_spend=('weekly_spend', 'sum'),
-            total_sales=('weekly_sales', 'sum'),
-            weeks_active=('Week', 'count'),
-            avg_cpc=('weekly_cpc', 'mean')  # Average CPC for the prior 4 weeks
-        ).reset_index()
-
-        # Calculate the average spend and average sales by dividing the total by the number of weeks active
-        spend_summary['4 Week Avg Spend'] = spend_summary['total_spend'] / spend_summary['weeks_active']
-        spend_summary['4 Week Avg Sales'] = spend_summary['total_sales'] / spend_summary['weeks_active']
-
-        # Calculate the average ACOS as 4 Week Avg Spend / 4 Week Avg Sales
-        spend_summary['4 Week Avg ACOS'] = (spend_summary['4 Week Avg Spend'] / spend_summary['4 Week Avg Sales']).replace([float('inf'), -float('inf')], 0).round(2)
-
-        # Calculate the last week's spend, sales, and CPC
-        last_week_spend = last_week_data.groupby(['Portfolio', 'Campaign Name', 'Targeting']).agg(
-            last_week_spend=('Ad Spend', 'sum'),
-            last_week_sales=('Ad Sales', 'sum'),
-            last_week_cpc=('CPC', 'mean')
-        ).reset_index()
-
-        # Calculate the last week's ACOS as Last Week Spend / Last Week Sales
-        last_week_spend['last_week_acos'] = (last_week_spend['last_week_spend'] / last_week_spend['last_week_sales']).replace([float('inf'), -float('inf')], 0).round(2)
-
-        # Merge the average spend and last week's spend into a single DataFrame
-        spend_tracking = spend_summary.merge(
-            last_week_spend.rename(columns={'last_week_spend': 'Last Week Spend', 'last_week_sales': 'Last Week Sales', 'last_week_cpc': 'Last Week CPC', 'last_week_acos': 'Last Week ACOS'}),
-            on=['Portfolio', 'Campaign Name', 'Targeting'],
-            how='left'
-        ).fillna(0)
-
-        # Calculate the change percentage
-        spend_tracking['Change'] = ((spend_tracking['Last Week Spend'] - spend_tracking['4 Week Avg Spend']) / spend_tracking['4 Week Avg Spend']).replace([float('inf'), -float('inf')], 0).round(2)
-
-        # Determine the status based on the change percentage
-        spend_tracking['Status'] = spend_tracking['Change'].apply(
-            lambda x: 'Increase 25% plus' if x > 0.25 else ('Decrease 25% plus' if x < -0.25 else 'Stable')
-        )
-
-        # Filter out 'Stable' keywords and those with zero spend last week
-        spend_tracking = spend_tracking[(spend_tracking['Status'] != 'Stable') & (spend_tracking['Last Week Spend'] > 0)]
-
-        # Select and order the final columns
-        spend_tracking = spend_tracking[['Portfolio', 'Campaign Name', 'Targeting', 'Status', '4 Week Avg Spend', 'Last Week Spend', 
-                                         '4 Week Avg Sales', 'Last Week Sales', '4 Week Avg ACOS', 'Last Week ACOS', 'avg_cpc', 'Last Week CPC']]
-        spend_tracking.rename(columns={'avg_cpc': '4 Week Avg CPC'}, inplace=True)
-
-        # Round all values to 2 decimal places
-        spend_tracking = spend_tracking.round(2)
-
-        return spend_tracking
-
+        return build_spend_tracking_sheet(cleaned_data, end_date)
     except Exception as e:
         st.error(f"Error in creating spend tracking sheet: {e}")
         return pd.DataFrame()
 
-# Function to adjust column widths
-def adjust_column_widths(writer):
-    workbook = writer.book
-    for sheetname in workbook.sheetnames:
-        worksheet = workbook[sheetname]
-        for col in worksheet.columns:
-            max_length = max(len(str(cell.value)) for cell in col) + 1
-            max_length = min(max_length, 30)
-            col_letter = col[0].column_letter
-            worksheet.column_dimensions[col_letter].width = max_length
-    
 # Function to convert DataFrame to Excel in memory and adjust column widths
 def to_excel(cleaned_data, review_data, portfolio_sheets, spend_tracking_data):
     try:
@@ -248,10 +103,10 @@ def to_excel(cleaned_data, review_data, portfolio_sheets, spend_tracking_data):
         review_data.to_excel(writer, index=False, sheet_name='Review')
         cleaned_data.to_excel(writer, index=False, sheet_name='Base')
 
+        # Valid sheet names that stay unique after invalid characters are replaced
+        sheet_names = unique_names(portfolio_sheets, reserved=SUMMARY_SHEETS)
         for portfolio, data in portfolio_sheets.items():
-            # Replace invalid characters in sheet names
-            safe_portfolio = "".join([c if c.isalnum() or c in [' ', '_'] else "_" for c in portfolio])
-            data.to_excel(writer, index=False, sheet_name=safe_portfolio)
+            data.to_excel(writer, index=False, sheet_name=sheet_names[portfolio])
 
         # Adjust column widths
         adjust_column_widths(writer)
@@ -266,12 +121,38 @@ def to_excel(cleaned_data, review_data, portfolio_sheets, spend_tracking_data):
         return None
            
 
+# Function to clean the upload and build the reports once per upload and settings;
+# reruns caused by other widgets reuse the cached result. A failing parallel shard raises.
+@st.cache_data(max_entries=4, show_spinner="Building reports...")
+def build_reports(file_id, _spooled_file, reader_engine, parallel):
+    cleaned_data = clean_amazon_data(_spooled_file, reader_engine)
+    if cleaned_data.empty:
+        return None
+
+    if parallel:
+        review_data, portfolio_sheets, spend_tracking_data, errors = aggregate_parallel(cleaned_data)
+        for error in errors:
+            st.error(error)
+    else:
+        review_data = create_review_sheet(cleaned_data)
+        portfolio_sheets = create_portfolio_sheets(cleaned_data)
+        spend_tracking_data = create_spend_tracking_sheet(cleaned_data)
+
+    return cleaned_data, review_data, portfolio_sheets, spend_tracking_data
+
+# Function to write the export once per upload, settings and export format
+@st.cache_data(max_entries=4, show_spinner="Writing export...")
+def build_export(file_id, reader_engine, parallel, export_format, _reports):
+    if export_format == "ZIP, one workbook per portfolio":
+        return to_zip(*_reports)
+    return to_excel(*_reports)
+
 # Streamlit app
 def main():
     st.title("Keyword Performance Tracker")
     st.markdown("""
 This app generates trackers to analyze targeting performance.<br><br>
-Input file - SP Targeting Report<br>
+Input file - SP Targeting Report (XLSX or CSV/TSV)<br>
 Time Unit - Daily<br><br>
 Content<br>
 >Spend Tracking: Targets having 25%+ Spend increase/decline<br>
@@ -281,19 +162,27 @@ Separate Portfolio Sheets<br>
 
 """, unsafe_allow_html=True)
 
-    uploaded_file = st.file_uploader("Upload Amazon SP Targeting Report (Make sure the time unit is Daily)", type="xlsx")
+    reader_engine = engine_selector()
+    export_format = st.sidebar.radio("Export format", ["Single workbook", "ZIP, one workbook per portfolio"])
+    parallel = st.sidebar.checkbox("Parallel aggregation (one process per portfolio shard)", value=False)
+
+    uploaded_file = st.file_uploader("Upload Amazon SP Targeting Report (Make sure the time unit is Daily)", type=UPLOAD_TYPES)
+
+    # Spool the upload to disk and read it through a memory map
+    spooled_file = spool_upload(uploaded_file)
 
     if uploaded_file is not None:
         st.write("File uploaded successfully!")
 
-        cleaned_data = clean_amazon_data(uploaded_file)
-        if cleaned_data.empty:
+        try:
+            reports = build_reports(uploaded_file.file_id, spooled_file, reader_engine, parallel)
+        except Exception as e:
+            st.error(f"Error in parallel aggregation: {e}")
+            return
+        if reports is None:
             st.error("Failed to clean data.")
             return
-        
-        review_data = create_review_sheet(cleaned_data)
-        portfolio_sheets = create_portfolio_sheets(cleaned_data)
-        spend_tracking_data = create_spend_tracking_sheet(cleaned_data)
+        cleaned_data, review_data, portfolio_sheets, spend_tracking_data = reports
 
         if review_data.empty:
             st.error("Failed to create review sheet.")
@@ -307,7 +196,7 @@ Separate Portfolio Sheets<br>
         #st.dataframe(review_data)
 
         st.write("Preview of spend tracking data:")
-        st.dataframe(spend_tracking_data)
+        show_preview(spend_tracking_data, key='spend_tracking', summary=summarize_output(spend_tracking_data), filter_column='Status')
 
         # Option to view individual portfolio sheets
         #st.write("Preview of individual portfolio sheets:")
@@ -315,7 +204,22 @@ Separate Portfolio Sheets<br>
             #st.write(f"Portfolio: {portfolio}")
             #st.dataframe(data.head())
 
-        cleaned_data_excel = to_excel(cleaned_data, review_data, portfolio_sheets, spend_tracking_data)
+        try:
+            export_data = build_export(uploaded_file.file_id, reader_engine, parallel, export_format, reports)
+        except Exception as e:
+            st.error(f"Error in writing export: {e}")
+            return
+
+        if export_format == "ZIP, one workbook per portfolio":
+            st.download_button(
+                label="Download ZIP file",
+                data=export_data,
+                file_name='Target_Review.zip',
+                mime='application/zip'
+            )
+            return
+
+        cleaned_data_excel = export_data
 
         if cleaned_data_excel:
             st.download_button(
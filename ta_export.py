@@ -0,0 +1,106 @@
+import zipfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from lazy_imports import lazy_import
+from ta_parallel import worker_pool, reset_worker_pool
+
+pd = lazy_import('pandas')
+
+# Sharded export for ta_analysis: every portfolio report is written as its own small
+# workbook by the shared worker pool and streamed into a ZIP as soon as it is ready.
+# This module does not import streamlit, so the workers load it cheaply.
+
+# Excel limits sheet names to 31 characters
+MAX_SHEET_NAME = 31
+
+# Sheets of the summary workbook, portfolio sheets must not take these names
+SUMMARY_SHEETS = ['Spend_Tracking', 'Review', 'Base']
+
+
+# Function to replace characters that are not valid in sheet and file names
+def sanitize_name(name):
+    return "".join([c if c.isalnum() or c in [' ', '_'] else "_" for c in str(name)]) or 'Portfolio'
+
+
+# Function to give every portfolio a unique valid name; Excel compares sheet names case-insensitively,
+# so names that only differ in case or in replaced characters get a numbered suffix instead of overwriting each other
+def unique_names(portfolios, max_length=MAX_SHEET_NAME, reserved=()):
+    taken = {name.lower() for name in reserved}
+    names = {}
+    for portfolio in portfolios:
+        base = sanitize_name(portfolio)[:max_length]
+        name = base
+        counter = 2
+        while name.lower() in taken:
+            suffix = f" ({counter})"
+            name = base[:max_length - len(suffix)] + suffix
+            counter += 1
+        taken.add(name.lower())
+        names[portfolio] = name
+    return names
+
+
+# Function to adjust column widths
+def adjust_column_widths(writer):
+    workbook = writer.book
+    for sheetname in workbook.sheetnames:
+        worksheet = workbook[sheetname]
+        for col in worksheet.columns:
+            max_length = max(len(str(cell.value)) for cell in col) + 1
+            max_length = min(max_length, 30)
+            col_letter = col[0].column_letter
+            worksheet.column_dimensions[col_letter].width = max_length
+
+
+# Function to write one portfolio report as its own workbook
+def portfolio_workbook(sheet_name, data):
+    output = BytesIO()
+    writer = pd.ExcelWriter(output, engine='openpyxl')
+    data.to_excel(writer, index=False, sheet_name=sheet_name)
+    adjust_column_widths(writer)
+    writer.close()
+    return output.getvalue()
+
+
+# Function to write the summary workbook with the Spend_Tracking, Review and Base sheets
+def summary_workbook(cleaned_data, review_data, spend_tracking_data):
+    output = BytesIO()
+    writer = pd.ExcelWriter(output, engine='openpyxl')
+    spend_tracking_data.to_excel(writer, index=False, sheet_name='Spend_Tracking')
+    review_data.to_excel(writer, index=False, sheet_name='Review')
+    cleaned_data.to_excel(writer, index=False, sheet_name='Base')
+    adjust_column_widths(writer)
+    writer.close()
+    return output.getvalue()
+
+
+# Function to export the reports as a ZIP: Summary.xlsx, one workbook per portfolio and a manifest
+def to_zip(cleaned_data, review_data, portfolio_sheets, spend_tracking_data):
+    file_names = unique_names(portfolio_sheets, max_length=100, reserved=['Summary'])
+    sheet_names = unique_names(portfolio_sheets)
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        pool = worker_pool()
+        futures = {pool.submit(summary_workbook, cleaned_data, review_data, spend_tracking_data): 'Summary.xlsx'}
+        for portfolio, data in portfolio_sheets.items():
+            futures[pool.submit(portfolio_workbook, sheet_names[portfolio], data)] = f"Portfolios/{file_names[portfolio]}.xlsx"
+
+        # XLSX files are already compressed, store them as they complete
+        try:
+            for future in as_completed(futures):
+                archive.writestr(futures[future], future.result(), compress_type=zipfile.ZIP_STORED)
+        except BrokenProcessPool:
+            reset_worker_pool()
+            raise
+
+        manifest = pd.DataFrame({
+            'Portfolio': list(portfolio_sheets),
+            'File': [f"Portfolios/{file_names[portfolio]}.xlsx" for portfolio in portfolio_sheets],
+            'Sheet': [sheet_names[portfolio] for portfolio in portfolio_sheets],
+            'Rows': [len(data) for data in portfolio_sheets.values()],
+        })
+        archive.writestr('manifest.csv', manifest.to_csv(index=False))
+
+    return output.getvalue()
@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from multiprocessing import shared_memory
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Portfolio-sharded execution mode for ta_analysis.
+# The cleaned targeting data is sorted by Portfolio and copied once into shared memory
+# (numeric columns as-is, text columns as integer codes), so the rows are never pickled and
+# a task only carries the text values its shard uses. Each worker aggregates one contiguous
+# shard of whole portfolios and the partial results are merged in portfolio order. The worker pool is kept
+# for the life of the server process, so worker start-up is paid once and not on every run.
+
+# Columns the review, portfolio and spend tracking aggregations read
+SHARED_COLUMNS = ['Date', 'Portfolio', 'Campaign Name', 'Targeting', 'Ad Spend', 'Ad Sales', 'CPC', 'ACOS']
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Function to get the process pool shared by the ta_analysis parallel modes, starting it on first use
+def worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+# Function to drop a pool whose workers died, so the next call starts a new one
+def reset_worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# Function to copy the columns of df into shared memory blocks
+def _share_columns(df):
+    blocks = []
+    layout = []
+    for column in df.columns:
+        values = df[column].to_numpy()
+        categories = None
+        if values.dtype == object:
+            codes, categories = pd.factorize(values)
+            values = codes.astype(np.int32)
+        elif np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype('datetime64[ns]')
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        layout.append((column, block.name, values.dtype.str, len(values), None if categories is None else np.asarray(categories, dtype=object)))
+    return blocks, layout
+
+
+# Function to narrow the layout to the rows [start, end): text columns only keep the names used in
+# those rows, in code order, so a task does not pickle every Targeting and Campaign Name of the upload
+def _shard_layout(blocks, layout, start, end):
+    shard_layout = []
+    for block, (column, name, dtype, length, categories) in zip(blocks, layout):
+        if categories is not None:
+            codes = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)[start:end]
+            categories = categories[np.unique(codes)]
+        shard_layout.append((column, name, dtype, length, categories))
+    return shard_layout
+
+
+# Function to rebuild the rows [start, end) of the shared data as a DataFrame
+def _shared_frame(layout, start, end):
+    data = {}
+    for column, name, dtype, length, categories in layout:
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)[start:end]
+            if categories is not None:
+                # The shard categories are the sorted distinct codes of these rows, so each code maps to its rank
+                data[column] = categories.take(np.searchsorted(np.unique(values), values))
+            else:
+                data[column] = values.copy()
+        finally:
+            block.close()
+    return pd.DataFrame(data)
+
+
+# Function to run the aggregations on one shard of portfolios; errors are raised to the parent
+def _aggregate_shard(layout, start, end, end_date):
+    from ta_reports import build_review_sheet, build_portfolio_sheets, build_spend_tracking_sheet
+
+    shard_data = _shared_frame(layout, start, end)
+    if not (shard_data['Date'] > end_date - timedelta(weeks=6)).any():
+        return pd.DataFrame(), ({}, []), pd.DataFrame()
+
+    return (
+        build_review_sheet(shard_data, end_date),
+        build_portfolio_sheets(shard_data, end_date),
+        build_spend_tracking_sheet(shard_data, end_date),
+    )
+
+
+# Function to split rows sorted by portfolio into contiguous shards of whole portfolios with balanced row counts
+def _shard_bounds(portfolio_offsets, n_shards):
+    total_rows = portfolio_offsets[-1]
+    targets = np.linspace(0, total_rows, n_shards + 1)[1:-1]
+    cuts = portfolio_offsets[np.searchsorted(portfolio_offsets, targets)]
+    bounds = np.unique(np.concatenate([[0], cuts, [total_rows]]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# Function to merge the partial review sheets into the serial layout
+def _merge_review(parts):
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+
+    # Each part is back in its groupby order once sorted by index, and shards hold consecutive portfolios,
+    # so concatenating them in shard order gives the portfolio order of the serial groupby; Portfolio
+    # values are not compared again, as rows without a portfolio hold 0 next to the portfolio names
+    review_data = pd.concat([part.sort_index() for part in parts], ignore_index=True)
+    dates = sorted(set(col.split()[0] for col in review_data.columns if col != 'Portfolio'))
+    columns = ['Portfolio'] + [f"{date} Spend" for date in dates] + [f"{date} ACOS" for date in dates]
+    review_data = review_data[columns]
+
+    # Weeks a portfolio had no rows in show zero spend; their ACOS is left as np.nan, which matches the serial 0/0 ACOS
+    spend_columns = [f"{date} Spend" for date in dates]
+    review_data[spend_columns] = review_data[spend_columns].fillna(0)
+
+    last_week_col = spend_columns[-1]
+    review_data.sort_values(by=last_week_col, ascending=False, inplace=True)
+    return review_data
+
+
+# Function to run the review, portfolio and spend tracking aggregations in a process pool, one shard per worker;
+# returns the three reports and the errors of portfolios that failed, a failing shard raises
+def aggregate_parallel(cleaned_data, workers=None):
+    workers = workers or os.cpu_count() or 1
+    end_date = cleaned_data['Date'].max()
+
+    # Sort by portfolio so every shard is a contiguous row range
+    portfolio_codes, portfolios = pd.factorize(cleaned_data['Portfolio'], sort=True)
+    order = np.argsort(portfolio_codes, kind='stable')
+    sorted_data = cleaned_data[SHARED_COLUMNS].iloc[order].reset_index(drop=True)
+    portfolio_offsets = np.concatenate([[0], np.cumsum(np.bincount(portfolio_codes, minlength=len(portfolios)))])
+    bounds = _shard_bounds(portfolio_offsets, min(workers, len(portfolios)))
+
+    blocks, layout = _share_columns(sorted_data)
+    futures = []
+    try:
+        pool = worker_pool()
+        futures = [
+            pool.submit(_aggregate_shard, _shard_layout(blocks, layout, start, end), int(start), int(end), end_date)
+            for start, end in bounds
+        ]
+        try:
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            reset_worker_pool()
+            raise
+    finally:
+        # After a failing shard the others may still be reading the blocks, so they are removed once every task is done
+        wait(futures)
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    review_data = _merge_review([review for review, _, _ in results])
+
+    # Portfolio sheets in the order the serial path creates them
+    portfolio_sheets = {}
+    errors = []
+    for _, (sheets, shard_errors), _ in results:
+        portfolio_sheets.update(sheets)
+        errors.extend(shard_errors)
+    recent_data = cleaned_data[cleaned_data['Date'] > end_date - timedelta(weeks=6)]
+    portfolio_sheets = {portfolio: portfolio_sheets[portfolio] for portfolio in recent_data['Portfolio'].unique() if portfolio in portfolio_sheets}
+
+    spend_tracking_parts = [spend_tracking for _, _, spend_tracking in results if not spend_tracking.empty]
+    spend_tracking_data = pd.concat(spend_tracking_parts, ignore_index=True) if spend_tracking_parts else pd.DataFrame()
+
+    return review_data, portfolio_sheets, spend_tracking_data, errors
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Aggregations behind the ta_analysis reports. This module does not import streamlit, so the
+# parallel workers can load it cheaply; errors are raised to the caller, which reports them.
+
+
+# Function to create the 'Review' sheet
+def build_review_sheet(cleaned_data, end_date=None):
+    if end_date is None:
+        end_date = cleaned_data['Date'].max()
+    start_date = end_date - timedelta(weeks=6)
+    recent_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= end_date)]
+    
+    ad_spend = recent_data.groupby(['Portfolio', pd.Grouper(key='Date', freq='W-SUN')])['Ad Spend'].sum().unstack(fill_value=0)
+    ad_sales = recent_data.groupby(['Portfolio', pd.Grouper(key='Date', freq='W-SUN')])['Ad Sales'].sum().unstack(fill_value=0)
+    acos = (ad_spend / ad_sales).replace([float('inf'), -float('inf'), pd.NA], 0).round(2)
+    
+    review_data = pd.concat([ad_spend, acos], axis=1, keys=['Spend', 'ACOS'])
+    review_data.columns = [f"{col[1].strftime('%m-%d-%Y')} {col[0]}" for col in review_data.columns]
+    
+    columns = ['Portfolio']
+    dates = sorted(set(col.split()[0] for col in review_data.columns))
+
+    # Add Spend columns first
+    for date in dates:
+        columns.append(f"{date} Spend")
+    
+    # Add ACOS columns after Spend columns
+    for date in dates:
+        columns.append(f"{date} ACOS")
+    
+    review_data = review_data.reset_index()
+    review_data = review_data[columns]
+    
+    last_week_col = [col for col in review_data.columns if 'Spend' in col][-1]
+    review_data.sort_values(by=last_week_col, ascending=False, inplace=True)
+    
+    return review_data
+
+
+# Function to create individual portfolio sheets with Ad Sales, Ad Spend, and ACOS columns;
+# portfolios that fail are skipped and their errors returned alongside the sheets
+def build_portfolio_sheets(cleaned_data, end_date=None):
+    portfolio_sheets = {}
+    errors = []
+
+    if end_date is None:
+        end_date = cleaned_data['Date'].max()
+    start_date = end_date - timedelta(weeks=6)
+    recent_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= end_date)]
+
+    portfolios = recent_data['Portfolio'].unique()
+
+    for portfolio in portfolios:
+        try:
+            portfolio_data = recent_data[recent_data['Portfolio'] == portfolio]
+
+            portfolio_sheet = portfolio_data.groupby(['Targeting', pd.Grouper(key='Date', freq='W-SUN')]).agg(
+                Ad_Sales=('Ad Sales', 'sum'),
+                Ad_Spend=('Ad Spend', 'sum'),
+                ACOS=('ACOS', 'mean')  # Assuming you want to average the ACOS over the week
+            ).unstack(fill_value=0)
+
+            portfolio_sheet.columns = ['_'.join([col[0], col[1].strftime('%m-%d-%Y')]) for col in portfolio_sheet.columns]
+            portfolio_sheet.reset_index(inplace=True)
+
+            # Collect all the unique dates present in the columns
+            dates = sorted(set(col.split('_')[1] for col in portfolio_sheet.columns if '_' in col))
+
+            for date in dates:
+                spend_col = f'Ad_Spend_{date}'
+                sales_col = f'Ad_Sales_{date}'
+                acos_col = f'ACOS_{date}'
+
+                # Add the Spend and ACOS columns if they don't already exist
+                if spend_col in portfolio_sheet.columns:
+                    portfolio_sheet[f'Spend_{date}'] = portfolio_sheet[spend_col]
+                if acos_col in portfolio_sheet.columns:
+                    portfolio_sheet[f'ACOS_{date}'] = portfolio_sheet[acos_col]
+
+            columns_to_keep = ['Targeting'] + [col for col in portfolio_sheet.columns if 'Ad_Sales' in col or 'Spend' in col or 'ACOS' in col]
+            portfolio_sheet = portfolio_sheet[columns_to_keep]
+
+            portfolio_sheets[portfolio] = portfolio_sheet
+
+        except Exception as e:
+            errors.append(f"Error processing portfolio {portfolio}: {e}")
+
+    return portfolio_sheets, errors
+
+
+# Function to create the 'Spend Tracking' sheet with adjusted calculations
+def build_spend_tracking_sheet(cleaned_data, end_date=None):
+    if end_date is None:
+        end_date = cleaned_data['Date'].max()
+    start_date = end_date - timedelta(weeks=5)
+    last_week_start = end_date - timedelta(weeks=1)
+    last_week_end = end_date
+
+    # Data for the prior 4 weeks excluding the last week
+    prior_4_weeks_data = cleaned_data[(cleaned_data['Date'] > start_date) & (cleaned_data['Date'] <= last_week_start)].copy()
+    # Data for the last week
+    last_week_data = cleaned_data[(cleaned_data['Date'] > last_week_start) & (cleaned_data['Date'] <= last_week_end)].copy()
+
+    # Add a new column to indicate the week
+    prior_4_weeks_data.loc[:, 'Week'] = prior_4_weeks_data['Date'].dt.isocalendar().week
+    last_week_data.loc[:, 'Week'] = last_week_data['Date'].dt.isocalendar().week
+
+    # Group by Portfolio, Campaign Name, Targeting, and Week to calculate total spend, sales, and CPC
+    spend_by_keyword = prior_4_weeks_data.groupby(['Portfolio', 'Campaign Name', 'Targeting', 'Week']).agg(
+        weekly_spend=('Ad Spend', 'sum'),
+        weekly_sales=('Ad Sales', 'sum'),
+        weekly_cpc=('CPC', 'mean')
+    ).reset_index()
+
+    # Calculate the number of weeks active and the total spend per keyword
+    spend_summary = spend_by_keyword.groupby(['Portfolio', 'Campaign Name', 'Targeting']).agg(
+        total_spend=('weekly_spend', 'sum'),
+        total_sales=('weekly_sales', 'sum'),
+        weeks_active=('Week', 'count'),
+        avg_cpc=('weekly_cpc', 'mean')  # Average CPC for the prior 4 weeks
+    ).reset_index()
+
+    # Calculate the average spend and average sales by dividing the total by the number of weeks active
+    spend_summary['4 Week Avg Spend'] = spend_summary['total_spend'] / spend_summary['weeks_active']
+    spend_summary['4 Week Avg Sales'] = spend_summary['total_sales'] / spend_summary['weeks_active']
+
+    # Calculate the average ACOS as 4 Week Avg Spend / 4 Week Avg Sales
+    spend_summary['4 Week Avg ACOS'] = (spend_summary['4 Week Avg Spend'] / spend_summary['4 Week Avg Sales']).replace([float('inf'), -float('inf')], 0).round(2)
+
+    # Calculate the last week's spend, sales, and CPC
+    last_week_spend = last_week_data.groupby(['Portfolio', 'Campaign Name', 'Targeting']).agg(
+        last_week_spend=('Ad Spend', 'sum'),
+        last_week_sales=('Ad Sales', 'sum'),
+        last_week_cpc=('CPC', 'mean')
+    ).reset_index()
+
+    # Calculate the last week's ACOS as Last Week Spend / Last Week Sales
+    last_week_spend['last_week_acos'] = (last_week_spend['last_week_spend'] / last_week_spend['last_week_sales']).replace([float('inf'), -float('inf')], 0).round(2)
+
+    # Merge the average spend and last week's spend into a single DataFrame
+    spend_tracking = spend_summary.merge(
+        last_week_spend.rename(columns={'last_week_spend': 'Last Week Spend', 'last_week_sales': 'Last Week Sales', 'last_week_cpc': 'Last Week CPC', 'last_week_acos': 'Last Week ACOS'}),
+        on=['Portfolio', 'Campaign Name', 'Targeting'],
+        how='left'
+    ).fillna(0)
+
+    # Calculate the change percentage
+    spend_tracking['Change'] = ((spend_tracking['Last Week Spend'] - spend_tracking['4 Week Avg Spend']) / spend_tracking['4 Week Avg Spend']).replace([float('inf'), -float('inf')], 0).round(2)
+
+    # Determine the status based on the change percentage
+    spend_tracking['Status'] = spend_tracking['Change'].apply(
+        lambda x: 'Increase 25% plus' if x > 0.25 else ('Decrease 25% plus' if x < -0.25 else 'Stable')
+    )
+
+    # Filter out 'Stable' keywords and those with zero spend last week
+    spend_tracking = spend_tracking[(spend_tracking['Status'] != 'Stable') & (spend_tracking['Last Week Spend'] > 0)]
+
+    # Select and order the final columns
+    spend_tracking = spend_tracking[['Portfolio', 'Campaign Name', 'Targeting', 'Status', '4 Week Avg Spend', 'Last Week Spend', 
+                                     '4 Week Avg Sales', 'Last Week Sales', '4 Week Avg ACOS', 'Last Week ACOS', 'avg_cpc', 'Last Week CPC']]
+    spend_tracking.rename(columns={'avg_cpc': '4 Week Avg CPC'}, inplace=True)
+
+    # Round all values to 2 decimal places
+    spend_tracking = spend_tracking.round(2)
+
+    return spend_tracking
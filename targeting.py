@@ -0,0 +1,79 @@
+import re
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Targeting classifier shared by the tools: every targeting expression or search term is tagged
+# with one targeting type, so filters compare a categorical column instead of re-running regex scans.
+# Each distinct string is classified only once per process and the result is cached.
+
+AUTO_TARGETING = ['close-match', 'loose-match', 'complements', 'substitutes']
+
+# Categories of the 'Targeting Type' column, in code order
+TARGETING_TYPES = ['keyword', 'broad-modifier', 'asin', 'category'] + AUTO_TARGETING
+
+TYPE_CODES = {targeting_type: code for code, targeting_type in enumerate(TARGETING_TYPES)}
+
+# ASINs are 'B0' followed by 8 letters or digits, bare in search terms or quoted in asin="..." and asin-expanded="..." expressions
+ASIN_PATTERN = re.compile(r'(?<![0-9a-z])b0[0-9a-z]{8}(?![0-9a-z])', re.IGNORECASE)
+
+# Category targeting expressions, e.g. category="Electronics" or category="123" price<25
+CATEGORY_PATTERN = re.compile(r'\s*category\s*=', re.IGNORECASE)
+
+# Classification of every distinct value seen so far, by value
+_type_cache = {}
+
+# The cache is dropped when it grows past this many values
+CACHE_LIMIT = 1_000_000
+
+
+# Function to classify values that are not in the cache yet in one vectorized pass, and cache them
+def _classify_new(values):
+    text = pd.Series([str(value) for value in values], dtype=object).str.strip().str.lower()
+    auto = text.isin(AUTO_TARGETING).to_numpy()
+    codes = np.select(
+        [
+            auto,
+            text.str.match(CATEGORY_PATTERN).to_numpy(dtype=bool),
+            text.str.contains(ASIN_PATTERN).to_numpy(dtype=bool),
+            text.str.contains('+', regex=False).to_numpy(dtype=bool),
+        ],
+        [
+            text.map(TYPE_CODES).where(auto, 0).to_numpy(dtype=np.int8),
+            TYPE_CODES['category'],
+            TYPE_CODES['asin'],
+            TYPE_CODES['broad-modifier'],
+        ],
+        default=TYPE_CODES['keyword'],
+    )
+    new_codes = dict(zip(values, codes.tolist()))
+    if len(_type_cache) + len(new_codes) > CACHE_LIMIT:
+        _type_cache.clear()
+    _type_cache.update(new_codes)
+    return new_codes
+
+
+# Function to tag every value of a targeting or search term column with its targeting type;
+# missing values count as keywords
+def classify_targeting(values):
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+
+    # Codes of this call are collected locally: the shared cache may be cleared at any time,
+    # by an eviction in _classify_new or by another session
+    type_codes = {}
+    new_values = []
+    for value in uniques:
+        code = _type_cache.get(value)
+        if code is None:
+            new_values.append(value)
+        else:
+            type_codes[value] = code
+    if new_values:
+        type_codes.update(_classify_new(new_values))
+
+    # One extra slot for the -1 code factorize gives missing values
+    unique_codes = np.array([type_codes[value] for value in uniques] + [TYPE_CODES['keyword']], dtype=np.int8)
+    targeting_types = pd.Categorical.from_codes(unique_codes[codes], categories=TARGETING_TYPES)
+    return pd.Series(targeting_types, index=values.index, name='Targeting Type')
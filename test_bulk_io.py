@@ -0,0 +1,30 @@
+import sys
+import zipfile
+import pytest
+import bulk_io
+
+
+@pytest.mark.parametrize('argv', [['--reader', 'bogus'], ['--reader']])
+def test_default_engine_falls_back_to_auto(monkeypatch, argv):
+    monkeypatch.setattr(sys, 'argv', ['app.py'] + argv)
+
+    with pytest.warns(UserWarning):
+        assert bulk_io.default_engine() == 'auto'
+
+
+def test_default_engine_from_environment(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['app.py'])
+    monkeypatch.setenv('BULK_READER', 'openpyxl-stream')
+
+    assert bulk_io.default_engine() == 'openpyxl-stream'
+
+
+def test_zip_without_sheet_files(tmp_path):
+    path = tmp_path / 'bulk.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('readme.md', 'no sheets here')
+
+    with pytest.raises(ValueError, match=r"Worksheet index 0 not found.*\.csv, \.tsv, \.txt or \.gz"):
+        bulk_io.read_sheet(str(path), 0)
+    with pytest.raises(ValueError, match=r"Worksheet named 'Sponsored Products Campaigns' not found"):
+        bulk_io.read_sheet(str(path), 'Sponsored Products Campaigns')
@@ -0,0 +1,29 @@
+import pandas as pd
+from preview import filter_sort, view_positions
+
+
+def test_sort_sparse_numeric_column():
+    df = pd.DataFrame({
+        'Entity': ['Campaign', 'Campaign', 'Keyword', 'Keyword', 'Keyword', 'Keyword', 'Campaign'],
+        'Daily Budget': [100.0, 25.0, '', '', '', '', 9.5],
+    })
+
+    view = filter_sort(df, sort_column='Daily Budget')
+
+    assert view['Daily Budget'].tolist() == [9.5, 25.0, 100.0, '', '', '', '']
+
+
+def test_sort_text_column():
+    df = pd.DataFrame({'Keyword Text': ['shoes', 'Bags', '', 'bags 2', 3]})
+
+    view = filter_sort(df, sort_column='Keyword Text')
+
+    assert view['Keyword Text'].tolist() == ['', 3, 'Bags', 'bags 2', 'shoes']
+
+
+def test_view_positions_with_duplicate_index():
+    df = pd.DataFrame({'Entity': ['Keyword', 'Campaign', 'Keyword'], 'Bid': [0.5, '', 0.25]}, index=[3, 3, 1])
+
+    positions = view_positions(df, filter_column='Entity', filter_values=['Keyword'], sort_column='Bid')
+
+    assert positions.tolist() == [2, 0]
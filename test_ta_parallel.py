@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta_parallel import aggregate_parallel
+from ta_reports import build_review_sheet, build_portfolio_sheets, build_spend_tracking_sheet
+
+
+# Cleaned targeting data as clean_amazon_data returns it; rows without a portfolio have Portfolio 0 after fillna(0)
+def cleaned_data():
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2024-01-01', periods=49, freq='D')
+    portfolios = [f'P{i:02d}' for i in range(6)] + [0]
+    rows = []
+    for date in dates:
+        for portfolio in portfolios:
+            for target in range(3):
+                spend = float(rng.uniform(0, 30))
+                sales = float(rng.uniform(0, 90))
+                rows.append({
+                    'Date': date, 'Portfolio': portfolio, 'Campaign Name': f'C-{portfolio}', 'Targeting': f'kw {target}',
+                    'Ad Spend': round(spend, 2), 'Ad Sales': round(sales, 2), 'CPC': round(float(rng.uniform(0.2, 2)), 2),
+                    'ACOS': round(spend / sales, 2),
+                })
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('workers', [1, 3, 8])
+def test_parallel_matches_serial(workers):
+    data = cleaned_data()
+    review, portfolio_sheets, spend_tracking, errors = aggregate_parallel(data, workers=workers)
+
+    assert errors == []
+    pd.testing.assert_frame_equal(review, build_review_sheet(data))
+    serial_sheets, _ = build_portfolio_sheets(data)
+    assert list(portfolio_sheets) == list(serial_sheets)
+    for portfolio, sheet in serial_sheets.items():
+        pd.testing.assert_frame_equal(portfolio_sheets[portfolio], sheet)
+    pd.testing.assert_frame_equal(spend_tracking, build_spend_tracking_sheet(data).reset_index(drop=True))
@@ -0,0 +1,21 @@
+import pandas as pd
+import targeting
+from targeting import classify_targeting
+
+
+def test_classify_targeting_types():
+    values = pd.Series(['red shoes', '+red +shoes', 'asin="B07ABCDEFG"', 'b08xyz1234', 'b0ss headphones',
+                        'category="Shoes"', 'category 5 cable', 'Loose-Match', None])
+    assert classify_targeting(values).tolist() == [
+        'keyword', 'broad-modifier', 'asin', 'asin', 'keyword', 'category', 'keyword', 'loose-match', 'keyword',
+    ]
+
+
+def test_classify_targeting_after_cache_eviction(monkeypatch):
+    monkeypatch.setattr(targeting, 'CACHE_LIMIT', 5)
+    monkeypatch.setattr(targeting, '_type_cache', {})
+    classify_targeting(pd.Series(['a', 'b', 'c', 'd']))
+
+    # 'a' is cached, 'x' and 'y' push the cache past the limit and clear it
+    result = classify_targeting(pd.Series(['a', 'x', 'y', 'close-match']))
+    assert result.tolist() == ['keyword', 'keyword', 'keyword', 'close-match']
@@ -0,0 +1,108 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import weakref
+import streamlit as st
+
+# Upload handling: every upload is spooled to a temp file once per session and read back through
+# a read-only memory map, so sheets are decompressed one at a time straight from the page cache
+# instead of from several in-memory copies. The spool directory is removed when the upload is
+# replaced or cleared, when the session's state is discarded, and at interpreter exit.
+
+SPOOL_CHUNK = 1024 * 1024
+
+
+class MappedUpload(io.RawIOBase):
+
+    def __init__(self, path, name):
+        super().__init__()
+        self.name = name
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else io.BytesIO()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._map.read(None if size is None or size < 0 else size)
+
+    def readinto(self, buffer):
+        data = self._map.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._map.seek(offset, whence)
+        return self._map.tell()
+
+    def tell(self):
+        return self._map.tell()
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+            self._file.close()
+        super().close()
+
+
+class UploadSpool:
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix='bulk-upload-')
+        self.file_id = None
+        self.path = None
+        self.mapped = []
+        # Runs when the session state holding the spool is discarded, or at exit
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    # Function to drop the current spooled file and close its maps
+    def clear(self):
+        for mapped in self.mapped:
+            mapped.close()
+        self.mapped = []
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.file_id = None
+        self.path = None
+
+    # Function to spool an upload to disk unless it already is, and open a memory-mapped reader on it
+    def open(self, uploaded_file):
+        file_id = getattr(uploaded_file, 'file_id', None) or id(uploaded_file)
+        if file_id != self.file_id:
+            self.clear()
+            path = os.path.join(self.directory, 'upload' + os.path.splitext(uploaded_file.name)[1])
+            uploaded_file.seek(0)
+            with open(path, 'wb') as spooled:
+                shutil.copyfileobj(uploaded_file, spooled, SPOOL_CHUNK)
+            self.file_id = file_id
+            self.path = path
+
+        # Readers handed out on earlier script runs are no longer in use
+        for mapped in self.mapped:
+            mapped.close()
+        self.mapped = [MappedUpload(self.path, uploaded_file.name)]
+        return self.mapped[0]
+
+
+# Function to get the spool of the current session
+def _session_spool(key):
+    if key not in st.session_state:
+        st.session_state[key] = UploadSpool()
+    return st.session_state[key]
+
+
+# Function to spool an uploaded file to disk once and return a memory-mapped reader for it;
+# pass None when the uploader is empty to release the previous upload right away
+def spool_upload(uploaded_file, key='upload_spool'):
+    spool = _session_spool(key)
+    if uploaded_file is None:
+        spool.clear()
+        return None
+    return spool.open(uploaded_file)
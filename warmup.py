@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Cold start helpers.
+#   start_warm_up()                     - called by every app, preloads heavy modules in a background
+#                                         thread while the user is still choosing a file (APP_WARMUP=0 disables it)
+#   python warmup.py run app.py [...]   - preloads everything, then starts the streamlit server in the
+#                                         same process, so the first session finds it all imported
+#   python warmup.py benchmark          - startup benchmark, fails if an app imports a heavy module
+#                                         at load or takes longer than the import-time budget
+
+HEAVY_MODULES = ['numpy', 'pandas', 'openpyxl', 'xlsxwriter', 'pyarrow']
+
+# Modules preloaded by the warm-up, in import order
+WARM_UP_MODULES = ['numpy', 'pandas', 'pandas.io.parsers', 'openpyxl', 'xlsxwriter', 'pyarrow', 'pyarrow.csv']
+
+APPS = ['SP_ST_performing.py', 'budget_update.py', 'growth_kws.py', 'pause_nonperforming_kws.py', 'ta_analysis.py']
+
+# Seconds an app may take to load, on top of importing streamlit itself
+IMPORT_BUDGET = 0.5
+
+_warm_up_started = threading.Event()
+
+
+# Function to import heavy modules and run every reader and writer once on a tiny workbook
+def warm_up():
+    from io import BytesIO
+    from lazy_imports import import_module
+    import bulk_io
+
+    for name in WARM_UP_MODULES:
+        import_module(name)
+    pd = import_module('pandas')
+
+    # Caches the auto-targeting types every targeting report contains
+    from targeting import classify_targeting, AUTO_TARGETING
+    classify_targeting(pd.Series(AUTO_TARGETING))
+
+    sample = pd.DataFrame({'Entity': ['Campaign'], 'Daily Budget': [1.0]})
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        sample.to_excel(writer, index=False, sheet_name='Sheet1')
+    for engine in bulk_io.ENGINES[1:]:
+        bulk_io.read_sheet(BytesIO(output.getvalue()), 0, engine)
+
+    csv_file = BytesIO(sample.to_csv(index=False).encode())
+    csv_file.name = 'warm_up.csv'
+    bulk_io.read_sheet(csv_file)
+
+
+# Function to start the warm-up once per process in a background thread; worker processes skip it.
+# The thread is not a daemon: an interpreter exiting while it is half-way through an import can hang,
+# so shutdown waits the few seconds it takes instead
+def start_warm_up():
+    if os.environ.get('APP_WARMUP', '1') == '0' or _warm_up_started.is_set() or multiprocessing.current_process().name != 'MainProcess':
+        return
+    _warm_up_started.set()
+    threading.Thread(target=warm_up, name='warm-up').start()
+
+
+# Script run in a fresh interpreter to time the first run of one app, after streamlit itself is imported
+_BENCHMARK_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+from lazy_imports import is_loaded
+preloaded = [name for name in sys.argv[2:] if is_loaded(name)]
+start = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+seconds = time.perf_counter() - start
+if app.exception:
+    sys.exit(app.exception[0].message)
+loaded = [name for name in sys.argv[2:] if is_loaded(name) and name not in preloaded]
+print(json.dumps({'seconds': seconds, 'loaded': loaded}))
+"""
+
+
+# Function to time loading every app and check it against the budget
+def benchmark(budget=IMPORT_BUDGET):
+    import json
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, APP_WARMUP='0')
+    failed = False
+    for app in APPS:
+        result = subprocess.run(
+            [sys.executable, '-c', _BENCHMARK_SCRIPT, app] + HEAVY_MODULES,
+            cwd=here, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"{app}: failed to load\n{result.stderr}")
+            failed = True
+            continue
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        over_budget = report['seconds'] > budget
+        failed = failed or over_budget or bool(report['loaded'])
+        status = 'OK' if not (over_budget or report['loaded']) else 'FAIL'
+        print(f"{status:4} {app:30} {report['seconds']:.3f}s  heavy modules loaded: {', '.join(report['loaded']) or 'none'}")
+    return not failed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        budget = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET
+        sys.exit(0 if benchmark(budget) else 1)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'run':
+        started = time.perf_counter()
+        warm_up()
+        print(f"Warm-up done in {time.perf_counter() - started:.2f}s")
+        from streamlit.web import cli
+        sys.argv = ['streamlit'] + sys.argv[1:]
+        sys.exit(cli.main())
+
+    print("usage: python warmup.py benchmark [budget_seconds] | python warmup.py run app.py [streamlit options]")
+    sys.exit(2)